@@ -1,16 +1,23 @@
-import streamlit as st
-import pandas as pd
-import yfinance as yf
-from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
-from openpyxl import load_workbook
-import shutil
-from io import BytesIO
+import hashlib
+import html
 import os
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
+import queue
+import threading
+import time
 from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from market_calendar import latest_market_close
+from notices import collect_warnings
+from report import INDEX_LIST_PATH, fetch_data, load_index_list, report_file_name, sort_final_df
+from singleflight import coalescing_stats, get_flight
+from snapshot_store import get_snapshot_store
+from timing import span, span_stats
 
 
 # ✅ 페이지 설정 (wide + 스타일 조정)
@@ -26,257 +33,218 @@ st.markdown("""
         th:nth-child(2), td:nth-child(2),
         th:nth-child(3), td:nth-child(3) {text-align: left;}
         section.main > div {overflow-x: hidden;}
+        .price-table td.txt {text-align: left;}
+        .price-table td.num {text-align: right;}
+        .price-table td.up {color: blue;}
+        .price-table td.down {color: red;}
+        .price-table td.pending {color: #bbb; text-align: center;}
     </style>
 """, unsafe_allow_html=True)
 
 # ===========================================
-# ✅ 함수: 데이터 수집
+# ✅ 세션 공용 결과 캐시 (키: 기준일 + index_list.csv 내용 해시)
 # ===========================================
-from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
-import pandas as pd
-import yfinance as yf
-import streamlit as st
 
-# 날짜 계산
-# def prepare_dates(selected_date):
-#     기준일 = datetime.combine(selected_date, datetime.min.time()).replace(tzinfo=ZoneInfo("Asia/Seoul"))
-#     start_date = 기준일 - timedelta(days=370)
-    
-#     # ✅ UTC 기준 시간 문제 방지: 오늘 날짜까지만 요청
-#     # today_utc = datetime.utcnow().date()
-#     # end_date = min(기준일 + timedelta(days=1), today_utc)
-#     end_date = 기준일 + timedelta(days=1)
-#     return 기준일, start_date, end_date
-
-def prepare_dates(selected_date):
-    기준일 = datetime.combine(selected_date, datetime.min.time()).replace(tzinfo=ZoneInfo("Asia/Seoul"))
-    start_date = 기준일 - timedelta(days=370)
-
-    # ✅ 오늘(UTC 기준)을 datetime 형식으로 변환
-    today_utc = datetime.utcnow().replace(tzinfo=ZoneInfo("UTC"))
-    today_utc_local = today_utc.astimezone(ZoneInfo("Asia/Seoul")).replace(hour=0, minute=0, second=0, microsecond=0)
-
-    # ✅ 기준일 다음날과 오늘(로컬 기준) 중 작은 값으로 제한
-    end_date = min(기준일 + timedelta(days=1), today_utc_local)
-
-    return 기준일, start_date, end_date
-
-# 영업일 추출
-def get_business_days(start_date, end_date):
-    all_dates = pd.date_range(start=start_date, end=end_date)
-    return all_dates[all_dates.weekday < 5]
-
-# 기준일 기준 기준연말, 전달말, 최근 5일 + 헤더 텍스트
-def get_reference_dates(기준일, business_days):
-    last_year = 기준일.year - 1
-    last_year_end = max([d for d in business_days if d.year == last_year])
-
-    prev_month = 기준일.month - 1 if 기준일.month > 1 else 12
-    prev_year = 기준일.year if 기준일.month > 1 else 기준일.year - 1
-    prev_month_end = datetime(prev_year, prev_month, 1, tzinfo=ZoneInfo("Asia/Seoul")) + timedelta(days=31)
-    prev_month_end = prev_month_end.replace(day=1) - timedelta(days=1)
-    prev_month_end = max([d for d in business_days if d.month == prev_month and d <= 기준일])
-
-    recent_days = [d for d in business_days if d < 기준일][-5:]
-
-    weekday_map = {0: "월", 1: "화", 2: "수", 3: "목", 4: "금", 5: "토", 6: "일"}
-    headers = [
-        f"{last_year % 100}년 未",
-        f"{기준일.year % 100}.{prev_month}월",
-    ] + [f"{d.month}/{d.day}({weekday_map[d.weekday()]})" for d in recent_days] + ["변동량", "변동률(%)"]
-
-    return last_year_end, prev_month_end, recent_days, headers
-
-# csv 로딩
-def load_index_list(path):
-    return pd.read_csv(path)
-
-def fetch_from_naver(ticker_code, country, category, label):
-    headers = {"User-Agent": "Mozilla/5.0"}
-
-    world_codes = {"FX_USDVND", "FX_USDIDR", "FX_USDPHP", "FX_USDCNY"}
-    if ticker_code in world_codes:
-        url = f"https://finance.naver.com/marketindex/worldDailyQuote.naver?fdtc=4&marketindexCd={ticker_code}&page=1&pageSize=500"
+def index_list_hash(path=INDEX_LIST_PATH):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+# 지난 기준일은 결과가 변하지 않으므로 만료 없이 보관
+@st.cache_data(show_spinner=False, max_entries=64)
+def _fetch_data_past(selected_date, index_hash, _on_record=None):
+    return fetch_data(selected_date, _on_record)
+
+# 오늘 기준일: 보고서 값(최근 영업일 = 기준일 이전 종가)은 시장이 마감할 때만 바뀌므로
+# 마감 시각을 키에 넣어 다음 마감까지 보관 (마감이 지나면 키가 바뀌어 새로 조회, 미리 조회가 마감 직후 다시 채움)
+@st.cache_data(show_spinner=False, max_entries=8)
+def _fetch_data_today(selected_date, index_hash, market_close_key, _on_record=None):
+    return fetch_data(selected_date, _on_record)
+
+# refresh=True(조회하기 버튼)이면 보관된 결과를 버리고 다시 수집
+# 수집 경고(issues)가 있었던 결과는 일시적 장애일 수 있으므로 캐시에 남기지 않음 (다음 조회 때 다시 수집)
+def _fetch_data_shared(selected_date, index_hash, on_record=None, refresh=False):
+    today = datetime.now(ZoneInfo("Asia/Seoul")).date()
+    if selected_date < today:
+        cached, args = _fetch_data_past, (selected_date, index_hash)
     else:
-        url = f"https://finance.naver.com/marketindex/exchangeDailyQuote.naver?marketindexCd={ticker_code}&page=1&pageSize=500"
-
-    response = requests.get(url, headers=headers)
-    soup = BeautifulSoup(response.text, "html.parser")
-    table = soup.select_one("table.tbl_exchange")
-    rows = table.select("tbody > tr")
-
-    records = []
-    for row in rows:
-        cols = row.select("td")
-        if len(cols) < 2:
-            continue
-        try:
-            raw_date = cols[0].text.strip()
-            raw_close = cols[1].text.strip().replace(",", "")
-            date_obj = datetime.strptime(raw_date, "%Y.%m.%d")
-            close_val = float(raw_close)
-            records.append([country, category, label, ticker_code, date_obj, close_val])
-        except ValueError:
-            continue
-
-    df = pd.DataFrame(records, columns=["국가", "구분", "단위", "Ticker", "Date", "Close"])
-    return df.sort_values("Date").reset_index(drop=True)
-
-import yfinance as yf
-
-def fetch_from_yfinance(ticker, start_date, end_date, country, category, label):
-    try:
-        data = yf.download(
-            ticker,
-            start=start_date.strftime("%Y-%m-%d"),
-            end=end_date.strftime("%Y-%m-%d"),
-            progress=False
-        )
-        # ✅ 데이터가 비어있는 경우 경고 출력
-        if data.empty:
-            st.warning(f"⚠️ {ticker} (yfinance): 조회된 데이터가 없습니다. 기간: {start_date.date()} ~ {end_date.date()}")
-            return None
-
-        if "Close" not in data.columns:
-            st.warning(f"⚠️ {ticker} (yfinance): 'Close' 컬럼이 존재하지 않습니다.")
-            return None
-
-        data = data.reset_index()
-        data = data[["Date", "Close"]]
-        data["국가"] = country
-        data["구분"] = category
-        data["단위"] = label
-        data["Ticker"] = ticker
-
-        return data[["국가", "구분", "단위", "Ticker", "Date", "Close"]]
-
-    except Exception as e:
-        st.warning(f"{ticker} (yfinance) 에러: {e}")
-        return None
-
-
-# 개별 티커 데이터 다운로드 및 전처리
-def fetch_price_data_by_source(ticker, start_date, end_date, row_meta):
-    source = row_meta.get("수집출처", "yfinance")
-    country = row_meta["국가"]
-    category = row_meta["구분"]
-    label = row_meta["항목명_짧은"]
-
-    if source == "yfinance":
-        return fetch_from_yfinance(ticker, start_date, end_date, country, category, label)
-    elif source == "naver":
-        return fetch_from_naver(ticker, country, category, label)
+        cached, args = _fetch_data_today, (selected_date, index_hash, latest_market_close().isoformat())
+    if refresh:
+        cached.clear(*args)
+    result = cached(*args, on_record)
+    if result[3]:
+        cached.clear(*args)
+    return result
+
+# 같은 기준일을 동시에 조회하면 하나의 fetch_data 결과를 함께 사용 (중복 횟수는 coalescing_stats() 로 확인)
+# on_record 는 실제로 수집하는 호출(캐시 미스 + leader)에서만 불림
+def fetch_data_cached(selected_date, on_record=None, refresh=False):
+    index_hash = index_list_hash()
+    return get_flight("fetch_data").do((selected_date, index_hash), _fetch_data_shared, selected_date, index_hash, on_record, refresh)
+
+# 조회 결과(df_final, df_raw, 최근 영업일)의 내용 해시
+def snapshot_hash(df_final, df_raw, recent_business_days):
+    digest = hashlib.sha256()
+    digest.update(repr(list(df_final.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df_final, index=False).to_numpy().tobytes())
+    digest.update(df_raw.fingerprint())
+    digest.update(repr([str(d) for d in recent_business_days]).encode())
+    return digest.hexdigest()
+
+# 내용 해시가 같으면 이미 만든 파일(bytes)을 그대로 반환 (데이터 인자는 해시 대상에서 제외)
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_workbook_cached(content_hash, _df_final, _df_raw, _recent_business_days):
+    from excel_export import build_workbook_bytes
+
+    with span("build_workbook", rows=len(_df_raw)):
+        return build_workbook_bytes(_df_final, _df_raw.to_long(), _recent_business_days)
+
+# ===========================================
+# ✅ 결과 테이블 HTML 생성
+# ===========================================
+TEXT_COLUMNS = ["국가", "구분", "단위"]
+CHANGE_COLUMNS = ["변동량", "변동률(%)"]
+PENDING_CELL = "⋯"
+
+# 열 단위 표시 문자열: 변동량/변동률은 +/△ 부호와 소수 1자리, 나머지는 1000 이상이면 천 단위 구분 정수, 아니면 소수 2자리
+def format_display_column(series):
+    if series.name in TEXT_COLUMNS or not pd.api.types.is_numeric_dtype(series):
+        return np.array(["" if pd.isna(v) else str(v) for v in series.tolist()], dtype=str)
+
+    values = series.to_numpy(dtype=float)
+    missing = np.isnan(values)
+    values = np.where(missing, 0.0, values)
+    if series.name in CHANGE_COLUMNS:
+        # printf 반올림(= 파이썬 round 와 같은 정확한 반올림)으로 소수 1자리 값 산출
+        rounded = np.char.mod("%.1f", values).astype(float)
+        sign = np.where(rounded > 0, "+", np.where(rounded < 0, "△", ""))
+        text = np.char.add(sign, np.char.mod("%.1f", np.abs(rounded)))
+        if series.name == "변동률(%)":
+            text = np.char.add(text, "%")
     else:
-        st.warning(f"{ticker}의 수집출처 {source}는 지원되지 않습니다.")
-        return None
-
-# def download_and_clean_ticker_data(ticker, start_date, end_date, row_meta):
-#     try:
-#         data = yf.download(
-#             ticker,
-#             start=start_date.strftime("%Y-%m-%d"),
-#             end=end_date.strftime("%Y-%m-%d"),
-#             progress=False
-#         )
-
-#         if data.empty or 'Close' not in data.columns:
-#             return None
-
-#         data = data.reset_index()
-#         data.columns = ["Date", "Close", "Open", "High", "Low", "Volume"]
-#         data["국가"] = row_meta["국가"]
-#         data["구분"] = row_meta["구분"]
-#         data["단위"] = row_meta["항목명_짧은"]
-#         data["Ticker"] = row_meta["티커"]
-
-#         return data[["국가", "구분", "단위", "Ticker", "Date", "Close", "Open", "High", "Low", "Volume"]]
-
-#     except Exception as e:
-#         st.warning(f"{ticker} 에러: {e}")
-#         return None
-
-# 개별 레코드 계산
-def calculate_price_record(price_series, row_meta, last_year_end, prev_month_end, recent_days, headers):
-    record = {
-        "국가": row_meta["국가"],
-        "구분": row_meta["구분"],
-        "단위": row_meta["항목명_짧은"],
-    }
-
-    # 인덱스를 날짜로 변환
-    price_series.index = price_series.index.date
-
-    values = {}
-    for d, h in zip([last_year_end, prev_month_end] + recent_days, headers[:-2]):
-        nearest_dates = [dt for dt in price_series.index if dt <= d.date()]
-        if not nearest_dates:
-            values[h] = None
-        else:
-            nearest_date = max(nearest_dates)
-            value = price_series.loc[nearest_date]
-            if isinstance(value, pd.Series):
-                value = value.item()
-            values[h] = value
-
-    try:
-        day_1 = values[headers[6]]
-        day_2 = values[headers[5]]
-        if (day_1 is None) or (day_2 is None) or (day_2 == 0):
-            diff, rate = None, None
-        else:
-            diff = day_1 - day_2
-            rate = (diff / day_2) * 100
-    except:
-        diff, rate = None, None
-
-    values["변동량"] = diff
-    values["변동률(%)"] = rate
-    record.update(values)
-    return record
-
-
-# 전체 데이터 수집 및 조합
-def collect_all_data(index_df, start_date, end_date, last_year_end, prev_month_end, recent_days, headers):
-    records = []
-    raw_records = []
-
-    for _, row in index_df.iterrows():
-        # data = download_and_clean_ticker_data(row["티커"], start_date, end_date, row)
-        data = fetch_price_data_by_source(row["티커"], start_date, end_date, row)
-        if data is None:
-            continue
-
-        data.columns = ["국가", "구분", "단위", "Ticker", "Date", "Close"]
-        raw_records.append(data)
-        price_series = data.set_index("Date")["Close"].dropna()
-        record = calculate_price_record(price_series, row, last_year_end, prev_month_end, recent_days, headers)
-        records.append(record)
-
-    df_raw = pd.concat(raw_records, axis=0, ignore_index=True) if raw_records else pd.DataFrame()
-    df_final = pd.DataFrame(records)
-    return df_final, df_raw
-
-# 결과 정렬
-def sort_final_df(df_final):
+        large = np.abs(values) >= 1000
+        thousands = pd.Series(np.round(values).astype(np.int64)).map("{:,}".format).to_numpy(dtype=str)
+        text = np.where(large, thousands, np.char.mod("%.2f", values))
+    return np.where(missing, "", text)
+
+# 열 단위 셀 class: 텍스트 열은 왼쪽, 숫자 열은 오른쪽 정렬 + 변동 열은 상승(파랑)/하락(빨강)
+def display_cell_classes(series):
+    if series.name in TEXT_COLUMNS:
+        return np.full(len(series), "txt")
+    if series.name in CHANGE_COLUMNS:
+        values = series.to_numpy(dtype=float)
+        return np.where(values > 0, "num up", np.where(values < 0, "num down", "num"))
+    return np.full(len(series), "num")
+
+# pending: 아직 수집 중인 행 표시(bool 배열) → 숫자 열을 ⋯ 로 채움
+def render_table_html(df_final, pending=None):
+    header = "".join(f"<th>{html.escape(str(col))}</th>" for col in df_final.columns)
+    rows = np.full(len(df_final), "<tr>")
+    for col in df_final.columns:
+        series = df_final[col]
+        text = np.array([html.escape(t) for t in format_display_column(series).tolist()], dtype=str)
+        classes = display_cell_classes(series)
+        if pending is not None and col not in TEXT_COLUMNS:
+            text = np.where(pending, PENDING_CELL, text)
+            classes = np.where(pending, "num pending", classes)
+        cells = np.char.add(np.char.add(np.char.add('<td class="', classes), '">'), text)
+        rows = np.char.add(rows, np.char.add(cells, "</td>"))
+    body = "".join(np.char.add(rows, "</tr>").tolist())
+    return f'<table class="price-table"><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>'
+
+# 같은 조회 결과(내용 해시)면 HTML 을 다시 만들지 않음
+@st.cache_data(show_spinner=False, max_entries=32)
+def render_table_html_cached(content_hash, _df_final):
+    with span("render_table_html", rows=len(_df_final)):
+        return render_table_html(_df_final)
+
+# ===========================================
+# ✅ 행 단위 표시: 조회를 작업 스레드에서 실행하고, 수집이 끝난 종목 행부터 표에 채워 넣음
+# ===========================================
+# 결과가 이미 공용 캐시에 있으면 행 단위 전달 없이 바로 반환된다.
+STREAM_REFRESH_SECONDS = 0.2
+
+# 지금까지 받은 행 + 대기 중인 행(⋯)을 최종 정렬(sort_final_df) 순서로 그린 HTML
+def render_partial_table_html(index_df, received):
+    partial = pd.DataFrame({
+        "국가": index_df["국가"].to_numpy(),
+        "구분": index_df["구분"].to_numpy(),
+        "단위": index_df["항목명_짧은"].to_numpy(),
+    })
+    values = pd.DataFrame.from_dict(received, orient="index").drop(columns=TEXT_COLUMNS)
+    partial = partial.join(values)
+    partial["_pending"] = ~partial.index.isin(list(received))
+    partial = sort_final_df(partial)
+    pending = partial.pop("_pending").to_numpy()
+    return render_table_html(partial, pending)
+
+# 수집 경고는 화면에 바로 띄우지 않고 결과(issues)로만 받음 → 같은 결과를 함께 받은 모든 세션이 show_issues 로 똑같이 표시
+def fetch_data_streaming(selected_date, placeholder, refresh=False):
+    index_df = load_index_list(INDEX_LIST_PATH)
+    records = queue.Queue()
+    outcome = {}
+    ctx = get_script_run_ctx()
+
+    def run():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        try:
+            with collect_warnings():
+                outcome["result"] = fetch_data_cached(selected_date, on_record=lambda position, record: records.put((position, record)), refresh=refresh)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            records.put(None)
+
+    worker = threading.Thread(target=run, name="fetch-data", daemon=True)
+    worker.start()
+
+    # 쌓인 행을 한꺼번에 반영하고 STREAM_REFRESH_SECONDS 간격으로만 다시 그림
+    received = {}
+    item = records.get()
+    while item is not None:
+        while item is not None:
+            received[item[0]] = item[1]
+            try:
+                item = records.get_nowait()
+            except queue.Empty:
+                break
+        if item is None:
+            break
+        placeholder.write(render_partial_table_html(index_df, received), unsafe_allow_html=True)
+        time.sleep(STREAM_REFRESH_SECONDS)
+        item = records.get()
+    worker.join()
+
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+def show_issues(issues):
+    for message in issues:
+        st.warning(message)
+
+# ===========================================
+# ✅ 백그라운드 미리 조회: 장 마감마다 오늘 기준일의 결과·표·엑셀 파일을 공용 캐시에 미리 계산
+# ===========================================
+# PREFETCH=0 이면 사용하지 않음 (첫 방문자가 직접 조회)
+PREFETCH_ENABLED = os.environ.get("PREFETCH", "1") != "0"
+
+# 마감 직후 방문자가 원천 반영 전 값으로 채운 항목이 있을 수 있으므로 보관된 결과를 버리고 다시 수집
+# 수집 경고가 있으면 결과가 캐시에 남지 않으므로 실패로 보고 재시도 간격(PREFETCH_RETRY) 후 다시 실행
+def warm_snapshot(selected_date):
+    df_final, df_raw, recent_business_days, issues = fetch_data_cached(selected_date, refresh=True)
+    if issues:
+        raise RuntimeError(f"수집 경고 {len(issues)}건: {issues[0]}")
+    content_hash = snapshot_hash(df_final, df_raw, recent_business_days)
     if not df_final.empty:
-        country_order = {"베트남": 0, "인니": 1, "한국": 2, "필리핀": 3, "중국": 4, "미국": 5}
-        category_order = {"주가": 0, "환율": 1}
-        df_final["국가순서"] = df_final["국가"].map(country_order)
-        df_final["구분순서"] = df_final["구분"].map(category_order)
-        df_final = df_final.sort_values(["국가순서", "구분순서"]).drop(columns=["국가순서", "구분순서"]).reset_index(drop=True)
-    return df_final
-
-# ✅ 메인 함수
-def fetch_data(selected_date):
-    기준일, start_date, end_date = prepare_dates(selected_date)
-    business_days = get_business_days(start_date, 기준일)
-    last_year_end, prev_month_end, recent_days, headers = get_reference_dates(기준일, business_days)
-    index_df = load_index_list("./index_list.csv")
-    df_final, df_raw = collect_all_data(index_df, start_date, end_date, last_year_end, prev_month_end, recent_days, headers)
-    df_final = sort_final_df(df_final)
-    return df_final, df_raw, recent_days
+        render_table_html_cached(content_hash, df_final)
+        build_workbook_cached(content_hash, df_final, df_raw, recent_business_days)
+
+# 서버 프로세스당 한 번만 시작
+@st.cache_resource(show_spinner=False)
+def start_prefetch_scheduler():
+    from prefetch import PrefetchScheduler
 
+    return PrefetchScheduler(warm_snapshot).start()
 
 # today = datetime.strptime('2025-04-30', '%Y-%m-%d').date()
 # df_final, df_raw, recent_days = fetch_data(today)
@@ -289,12 +257,13 @@ def fetch_data(selected_date):
 
 today_kst = datetime.now(ZoneInfo("Asia/Seoul")).date()
 
+if PREFETCH_ENABLED:
+    start_prefetch_scheduler()
+
 if "ready" not in st.session_state:
     st.session_state["ready"] = True
 if "last_selected_date" not in st.session_state:
     st.session_state["last_selected_date"] = today_kst
-if "downloading" not in st.session_state:
-    st.session_state["downloading"] = False
 
 col1, col2, col3, col4 = st.columns([2.5, 1, 1, 1])
 with col1:
@@ -310,118 +279,54 @@ if selected_date != st.session_state["last_selected_date"]:
     st.session_state["ready"] = False
     st.session_state["last_selected_date"] = selected_date
 
-if 'df_final' not in st.session_state:
+table_placeholder = st.empty()
+
+# 세션에는 공용 저장소(snapshot_store)의 결과를 가리키는 핸들만 보관
+def store_snapshot(df_final, df_raw, recent_business_days):
+    content_hash = snapshot_hash(df_final, df_raw, recent_business_days)
+    st.session_state.snapshot = get_snapshot_store().put(content_hash, df_final, df_raw, recent_business_days)
+    st.session_state["ready"] = True
+
+if "snapshot" not in st.session_state:
     with st.spinner("\u2728 초기 데이터 불러오는 중입니다..."):
-        df_final, df_raw, recent_business_days = fetch_data(selected_date)
-        st.session_state.df_final = df_final
-        st.session_state.df_raw = df_raw
-        st.session_state.recent_business_days = recent_business_days
-        st.session_state["ready"] = True
+        *result, issues = fetch_data_streaming(selected_date, table_placeholder)
+        store_snapshot(*result)
+    show_issues(issues)
 elif fetch_button:
-    with st.spinner("\ud83d\ude80 새 데이터 조회 중입니다... 조금만 기다려주세요!"):
-        df_final, df_raw, recent_business_days = fetch_data(selected_date)
-        st.session_state.df_final = df_final
-        st.session_state.df_raw = df_raw
-        st.session_state.recent_business_days = recent_business_days
-        st.session_state["ready"] = True
-
-# ✅ 테이블 표시
-if 'df_final' in st.session_state and st.session_state["ready"] and not st.session_state["downloading"] and not st.session_state.df_final.empty:
-    df_display = st.session_state.df_final.copy()
-
-    def format_value(val, col=None):
-        try:
-            if pd.isna(val):
-                return ""
-            if isinstance(val, str):
-                return val
-
-            if col in ["변동량", "변동률(%)"]:
-                val = round(val, 1)
-                if val > 0:
-                    return f"+{val:.1f}" if col == "변동량" else f"+{val:.1f}%"
-                elif val < 0:
-                    return f"△{abs(val):.1f}" if col == "변동량" else f"△{abs(val):.1f}%"
-                else:
-                    return f"{val:.1f}" if col == "변동량" else f"{val:.1f}%"
-
-            if abs(val) >= 1000:
-                return f"{int(round(val)):,}"
-            else:
-                return f"{val:.2f}"
-        except:
-            return val
-
-    def style_row(row):
-        styles = []
-        for col in row.index:
-            cell_style = "text-align: right;"
-            if col in ["변동률(%)", "변동량"]:
-                try:
-                    val = row[col]
-                    if pd.isna(val):
-                        styles.append(cell_style)
-                        continue
-                    if val > 0:
-                        cell_style += "color: blue;"
-                    elif val < 0:
-                        cell_style += "color: red;"
-                except:
-                    pass
-            if col in ["국가", "구분", "단위"]:
-                cell_style = "text-align: left;"
-            styles.append(cell_style)
-        return styles
-
-    formatters = {col: (lambda val, c=col: format_value(val, c)) for col in df_display.columns}
-
-    styled_table = (
-        df_display.style
-        .format(formatters, na_rep="")
-        .apply(style_row, axis=1)
-    )
-
-    st.write(styled_table.to_html(index=False), unsafe_allow_html=True)
-
-    # ✅ 엑셀 다운로드 버튼
-    output = BytesIO()
-    shutil.copy("./tmp/국가별 주가환율 테이블 템플릿_edit_v3.xlsx", "./tmp/temp_save.xlsx")
-    wb = load_workbook("./tmp/temp_save.xlsx")
-
-    ws_table = wb["table"]
-    for row in ws_table.iter_rows(min_row=1, max_row=ws_table.max_row, min_col=1, max_col=ws_table.max_column):
-        for cell in row:
-            cell.value = None
-    for idx, col_name in enumerate(st.session_state.df_final.columns, 1):
-        ws_table.cell(row=1, column=idx).value = col_name
-    for row_idx, row in enumerate(st.session_state.df_final.values, 2):
-        for col_idx, value in enumerate(row, 1):
-            ws_table.cell(row=row_idx, column=col_idx).value = value
-
-    ws_name = wb["name"]
-    start_day = st.session_state.recent_business_days[0]
-    end_day = st.session_state.recent_business_days[-1]
-    ws_name["A1"] = f"{start_day.month}/{start_day.day}~{end_day.month}/{end_day.day}"
-
-    ws_raw = wb["rawdata"]
-    for idx, col_name in enumerate(st.session_state.df_raw.columns, 1):
-        ws_raw.cell(row=1, column=idx).value = col_name
-        print(col_name)
-    for row_idx, row in enumerate(st.session_state.df_raw.values, 2):
-        for col_idx, value in enumerate(row, 1):
-            ws_raw.cell(row=row_idx, column=col_idx).value = value
-
-    wb.save(output)
-    output.seek(0)
-
-    save_date = selected_date.strftime("%y%m%d")
-    if download_placeholder.download_button(
+    with st.spinner("\U0001F680 새 데이터 조회 중입니다... 조금만 기다려주세요!"):
+        *result, issues = fetch_data_streaming(selected_date, table_placeholder, refresh=True)
+        store_snapshot(*result)
+    show_issues(issues)
+
+# ✅ 테이블 표시 (공용 결과를 복사 없이 그대로 읽음)
+snapshot = st.session_state.snapshot.snapshot if "snapshot" in st.session_state else None
+if snapshot is not None and st.session_state["ready"] and not snapshot.df_final.empty:
+    content_hash = snapshot.key
+    table_placeholder.write(render_table_html_cached(content_hash, snapshot.df_final), unsafe_allow_html=True)
+
+    # ✅ 엑셀 다운로드 버튼 (클릭했을 때만 생성, 같은 데이터면 캐시된 파일 재사용)
+    download_placeholder.download_button(
         label="\U0001F4C4 엑셀 다운로드",
-        data=output,
-        file_name=f"국가별_주가환율정보_{save_date}.xlsx",
+        data=lambda: build_workbook_cached(content_hash, snapshot.df_final, snapshot.df_raw, snapshot.recent_business_days),
+        file_name=report_file_name(selected_date),
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        on_click="ignore",
         use_container_width=True
-    ):
-        st.session_state["downloading"] = True
-    else:
-        st.session_state["downloading"] = False
\ No newline at end of file
+    )
+else:
+    table_placeholder.empty()
+
+# ✅ 디버그 패널 (?debug=1): 최근 실행의 단계별 소요 시간 p50/p95 + 동일 요청 합치기(single-flight) 횟수
+if st.query_params.get("debug") == "1":
+    with st.expander("⏱ 단계별 소요 시간 (최근 실행 기준)", expanded=True):
+        stats = span_stats()
+        if stats:
+            st.table(pd.DataFrame(stats).round(1))
+        else:
+            st.caption("아직 기록된 구간이 없습니다.")
+    with st.expander("🔗 동일 요청 합치기 (프로세스 시작 이후)", expanded=True):
+        flights = coalescing_stats()
+        if flights:
+            st.table(pd.DataFrame.from_dict(flights, orient="index").rename_axis("flight"))
+        else:
+            st.caption("아직 기록된 호출이 없습니다.")
@@ -0,0 +1,262 @@
+import asyncio
+import contextvars
+import queue
+import threading
+from urllib.parse import urlsplit
+
+import httpx
+import numpy as np
+
+from fetch_plan import widen_window, window_span
+from notices import collect_warnings
+from price_store import get_price_store
+from singleflight import get_async_flight
+from sources import (
+    BATCH_SOURCES, NAVER_DEADLINE_SECONDS, NAVER_INCREMENTAL_PAGE_SIZE, NAVER_MAX_PAGE_SIZE, NAVER_TIMEOUT,
+    RANGELESS_SOURCES, as_fetch_datetime, fetch_batch_windows_by_source, fetch_price_windows_by_source,
+    has_anchor_value, load_windows, naver_page_size, naver_url, parse_naver_table, raw_frame, save_fetched,
+)
+from timing import span
+from yahoo_chart import YAHOO_CHART_HEADERS, YahooChartError, chart_params, chart_url, clip_to_range, parse_chart
+
+# ===========================================
+# ✅ 비동기 수집 계층 (asyncio + httpx)
+# ===========================================
+# 프로세스당 하나의 이벤트 루프 스레드가 공용 HTTP 연결 풀(httpx.AsyncClient)을 소유하고,
+# 모든 세션의 수집 요청을 코루틴으로 받아 처리한다 (요청마다 스레드를 만들지 않음).
+# - 호스트별 세마포어로 동시 요청 수를 제한
+# - 가격 저장소(SQLite) 조회·저장과 DataFrame 생성은 asyncio.to_thread 로 루프 밖에서 실행 (루프는 네트워크 대기만 담당)
+# - 비동기 클라이언트가 없는 출처는 수집출처 그대로 동기 수집 함수를 asyncio.to_thread 로 실행
+#   (yfinance 는 sources 의 yf.download 일괄 조회, 출처별로 한 번)
+# - 이벤트 루프 스레드에서는 st.warning 을 쓸 수 없으므로 경고 문구는 목록으로 모아 호출한 쪽에서 표시
+
+HOST_CONCURRENCY = {"query1.finance.yahoo.com": 8, "finance.naver.com": 5}
+DEFAULT_HOST_CONCURRENCY = 4
+ASYNC_POOL_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+ASYNC_RETRIES = 3
+ASYNC_BACKOFF_SECONDS = 0.5
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_loop = None
+_loop_lock = threading.Lock()
+
+# 아래 상태는 이벤트 루프 스레드에서만 사용
+_client = None
+_host_limits = {}
+
+
+def get_event_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="async-sources", daemon=True).start()
+            _loop = loop
+        return _loop
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=ASYNC_POOL_LIMITS,
+            timeout=httpx.Timeout(NAVER_TIMEOUT[1], connect=NAVER_TIMEOUT[0]),
+            follow_redirects=True,
+        )
+    return _client
+
+
+def _host_limit(url):
+    host = urlsplit(url).hostname
+    if host not in _host_limits:
+        _host_limits[host] = asyncio.Semaphore(HOST_CONCURRENCY.get(host, DEFAULT_HOST_CONCURRENCY))
+    return _host_limits[host]
+
+
+# 일시적 오류(연결 오류, 429/5xx)는 지수 백오프로 재시도
+async def _get(url, **kwargs):
+    for attempt in range(ASYNC_RETRIES + 1):
+        try:
+            async with _host_limit(url):
+                response = await _get_client().get(url, **kwargs)
+            if response.status_code not in RETRY_STATUS or attempt == ASYNC_RETRIES:
+                response.raise_for_status()
+                return response
+        except httpx.TransportError:
+            if attempt == ASYNC_RETRIES:
+                raise
+        await asyncio.sleep(ASYNC_BACKOFF_SECONDS * 2 ** attempt)
+
+
+# ✅ Yahoo chart API
+async def fetch_from_yahoo_chart_async(ticker, start_date, end_date, country, category, label, warnings, warn_empty=True):
+    try:
+        response = await _get(
+            chart_url(ticker),
+            params=chart_params(start_date, end_date),
+            headers=YAHOO_CHART_HEADERS,
+        )
+        dates, closes = clip_to_range(*parse_chart(response.content), start_date, end_date)
+    except (httpx.HTTPError, YahooChartError, ValueError, KeyError, IndexError) as e:
+        warnings.append(f"{ticker} (yahoo chart) 에러: {e}")
+        return None
+
+    if len(dates) == 0 and warn_empty:
+        warnings.append(f"⚠️ {ticker} (yahoo chart): 조회된 데이터가 없습니다. 기간: {start_date.date()} ~ {end_date.date()}")
+    return raw_frame(ticker, country, category, label, dates, closes)
+
+
+# ✅ 네이버 환율 일별 시세 (동기 버전 fetch_from_naver 와 같은 페이지 규칙)
+async def fetch_from_naver_async(ticker_code, country, category, label, warnings, page_size=NAVER_MAX_PAGE_SIZE, stop_date=None):
+    headers = {"User-Agent": "Mozilla/5.0"}
+
+    async def pages():
+        if stop_date is None:
+            response = await _get(naver_url(ticker_code, 1, page_size), headers=headers)
+            return parse_naver_table(response.text)
+
+        stop = np.datetime64(stop_date, "D")
+        date_chunks, close_chunks = [], []
+        max_pages = -(-NAVER_MAX_PAGE_SIZE // NAVER_INCREMENTAL_PAGE_SIZE)
+        for page in range(1, max_pages + 1):
+            response = await _get(naver_url(ticker_code, page, NAVER_INCREMENTAL_PAGE_SIZE), headers=headers)
+            page_dates, page_closes = parse_naver_table(response.text)
+            older = np.flatnonzero(page_dates < stop)
+            keep = older[0] if len(older) else len(page_dates)
+            date_chunks.append(page_dates[:keep])
+            close_chunks.append(page_closes[:keep])
+            if len(older) or len(page_dates) < NAVER_INCREMENTAL_PAGE_SIZE:
+                break
+        return np.concatenate(date_chunks), np.concatenate(close_chunks)
+
+    try:
+        dates, closes = await asyncio.wait_for(pages(), NAVER_DEADLINE_SECONDS)
+    except asyncio.TimeoutError:
+        warnings.append(f"⚠️ {ticker_code} (naver): 수집 제한 시간({NAVER_DEADLINE_SECONDS}초)을 넘겨 중단했습니다.")
+        return None
+    except httpx.HTTPError as e:
+        warnings.append(f"{ticker_code} (naver) 에러: {e}")
+        return None
+
+    return raw_frame(ticker_code, country, category, label, dates[::-1], closes[::-1])
+
+
+# ✅ 출처 → 비동기 수집 함수
+async def _yahoo_chart_source(ticker, start_date, end_date, row_meta, warnings, delta):
+    return await fetch_from_yahoo_chart_async(
+        ticker, start_date, end_date, row_meta["국가"], row_meta["구분"], row_meta["항목명_짧은"],
+        warnings, warn_empty=not delta,
+    )
+
+
+async def _naver_source(ticker, start_date, end_date, row_meta, warnings, delta):
+    country, category, label = row_meta["국가"], row_meta["구분"], row_meta["항목명_짧은"]
+    page_size = naver_page_size(start_date)
+    if page_size <= NAVER_INCREMENTAL_PAGE_SIZE * 3:
+        return await fetch_from_naver_async(ticker, country, category, label, warnings, stop_date=start_date.date())
+    return await fetch_from_naver_async(ticker, country, category, label, warnings, page_size=page_size)
+
+
+ASYNC_SOURCES = {
+    "yahoo_chart": _yahoo_chart_source,
+    "naver": _naver_source,
+}
+
+
+# 구간이 저장소에 있거나 새로 받아 저장했으면 True, 수집에 실패했으면 False
+async def _ensure_stored_async(store, ticker, start_date, end_date, row_meta, warnings):
+    missing = await asyncio.to_thread(store.missing_range, ticker, start_date, end_date)
+    if missing is None:
+        return True
+    source = row_meta.get("수집출처", "yfinance")
+
+    async def refresh():
+        fetch_start = as_fetch_datetime(missing[0], start_date)
+        fetch_end = as_fetch_datetime(missing[1], start_date)
+        data = await ASYNC_SOURCES[source](ticker, fetch_start, fetch_end, row_meta, warnings, True)
+        if data is None:
+            return False
+        await asyncio.to_thread(save_fetched, store, ticker, data, fetch_start, fetch_end, row_meta)
+        return True
+
+    # 같은 티커·구간의 갱신은 루프 안에서 하나의 작업으로 합침 (중복 횟수는 coalescing_stats() 로 확인)
+    return await get_async_flight("refresh_ticker_async").do((source, ticker, missing), refresh)
+
+
+# 동기 수집 함수를 작업 스레드에서 실행하고, 그 안의 경고(notices.warn)는 warnings 에 모음
+# 루프의 작업은 호출한 쪽의 contextvars(경고 수집·기록 대상)를 물려받으므로 빈 컨텍스트에서 실행해 경고가 한 번만 전달되게 함
+def _run_collecting(warnings, fn, *args):
+    def run():
+        with collect_warnings() as messages:
+            try:
+                return fn(*args)
+            finally:
+                warnings.extend(messages)
+
+    return contextvars.Context().run(run)
+
+
+# 계획 구간별로 받고, 받았지만 기준일 이전 값이 없는 구간은 앞쪽을 넓혀 다시 받음 (sources.fetch_price_windows_by_source 와 같은 규칙)
+# 수집에 실패하면 더 요청하지 않고 None
+async def fetch_price_windows_async(ticker, windows, row_meta, warnings):
+    source = row_meta.get("수집출처", "yfinance")
+    if source not in ASYNC_SOURCES:
+        return await asyncio.to_thread(_run_collecting, warnings, fetch_price_windows_by_source, ticker, windows, row_meta)
+
+    store = await asyncio.to_thread(get_price_store)
+    if source in RANGELESS_SOURCES:
+        if not await _ensure_stored_async(store, ticker, *window_span(windows), row_meta, warnings):
+            return None
+
+    fetched = []
+    for window in windows:
+        while True:
+            if not await _ensure_stored_async(store, ticker, window[0], window[1], row_meta, warnings):
+                return None
+            if await asyncio.to_thread(has_anchor_value, store, ticker, window):
+                break
+            wider = widen_window(window)
+            if wider is None:
+                warnings.append(f"⚠️ {ticker}: {window[2].date()} 이전 데이터가 없습니다. 기간: {window[0].date()} ~ {window[1].date()}")
+                break
+            window = wider
+        fetched.append(window)
+    return await asyncio.to_thread(load_windows, store, ticker, fetched, row_meta)
+
+
+# 완료되는 순서대로 (입력 위치, 결과) 를 내보내는 제너레이터 (호출한 스레드에서 소비). 경고 문구는 warnings 에 모음
+# 일괄 조회 출처(BATCH_SOURCES)의 행은 출처별로 묶어 작업 스레드에서 한 번에 수집
+def iter_rows_async(rows, windows, warnings):
+    completed = queue.Queue()
+
+    batch_groups = {}
+    for position, row in enumerate(rows):
+        source = row.get("수집출처", "yfinance")
+        if source in BATCH_SOURCES:
+            batch_groups.setdefault(source, []).append(position)
+    batched = {i for positions in batch_groups.values() for i in positions}
+
+    async def fetch(position, row):
+        with span("fetch", source=row.get("수집출처", "yfinance"), ticker=row["티커"], backend="async"):
+            return [(position, await fetch_price_windows_async(row["티커"], windows, row, warnings))]
+
+    async def fetch_batch(source, positions):
+        batch = [rows[i] for i in positions]
+        with span("fetch_batch", source=source, ticker=",".join(row["티커"] for row in batch), backend="async"):
+            results = await asyncio.to_thread(_run_collecting, warnings, fetch_batch_windows_by_source, source, batch, windows)
+        return [(i, results.get(rows[i]["티커"])) for i in positions]
+
+    async def run():
+        try:
+            tasks = [fetch_batch(source, positions) for source, positions in batch_groups.items()]
+            tasks += [fetch(i, row) for i, row in enumerate(rows) if i not in batched]
+            for next_done in asyncio.as_completed(tasks):
+                for item in await next_done:
+                    completed.put(item)
+        finally:
+            completed.put(None)
+
+    future = asyncio.run_coroutine_threadsafe(run(), get_event_loop())
+    while (item := completed.get()) is not None:
+        yield item
+    future.result()
@@ -0,0 +1,121 @@
+"""엑셀 내보내기(build_workbook_bytes) 벤치마크.
+
+rawdata 10,000행 / 100,000행짜리 가상 df_raw 로
+셀 단위로 값을 넣던 기존 방식(legacy)과 스트리밍 방식의 생성 시간을 비교하고,
+두 결과 파일의 table / name / rawdata 시트 값이 같은지 확인한다.
+
+    python bench/bench_excel_export.py [--rows 10000 100000] [--skip-legacy]
+"""
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from excel_export import build_workbook_bytes, new_workbook_from_template  # noqa: E402
+from openpyxl import load_workbook  # noqa: E402
+from report import INDEX_LIST_PATH  # noqa: E402
+
+
+def make_frames(n_rows):
+    index_df = pd.read_csv(INDEX_LIST_PATH)
+    per_ticker = -(-n_rows // len(index_df))
+    dates = pd.bdate_range(end="2025-04-30", periods=per_ticker)
+    rng = np.random.default_rng(0)
+
+    frames = []
+    for _, row in index_df.iterrows():
+        frames.append(pd.DataFrame({
+            "국가": row["국가"],
+            "구분": row["구분"],
+            "단위": row["항목명_짧은"],
+            "Ticker": row["티커"],
+            "Date": dates,
+            "Close": 1000 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates)))),
+        }))
+    df_raw = pd.concat(frames, ignore_index=True).iloc[:n_rows]
+
+    recent_days = list(dates[-6:-1])
+    headers = ["24년 未", "25.3월"] + [f"{d.month}/{d.day}" for d in recent_days] + ["변동량", "변동률(%)"]
+    df_final = pd.DataFrame({
+        "국가": index_df["국가"],
+        "구분": index_df["구분"],
+        "단위": index_df["항목명_짧은"],
+    })
+    for h in headers:
+        df_final[h] = rng.normal(1000, 100, len(index_df))
+    df_final.iloc[0, -1] = np.nan
+    return df_final, df_raw, recent_days
+
+
+# 변경 전 방식: 모든 값을 ws.cell(...).value 로 한 칸씩 기록
+def build_workbook_legacy(df_final, df_raw, recent_business_days):
+    output = BytesIO()
+    wb = new_workbook_from_template()
+
+    ws_table = wb["table"]
+    for idx, col_name in enumerate(df_final.columns, 1):
+        ws_table.cell(row=1, column=idx).value = col_name
+    for row_idx, row in enumerate(df_final.values, 2):
+        for col_idx, value in enumerate(row, 1):
+            ws_table.cell(row=row_idx, column=col_idx).value = value
+
+    ws_name = wb["name"]
+    start_day = recent_business_days[0]
+    end_day = recent_business_days[-1]
+    ws_name["A1"] = f"{start_day.month}/{start_day.day}~{end_day.month}/{end_day.day}"
+
+    ws_raw = wb["rawdata"]
+    for idx, col_name in enumerate(df_raw.columns, 1):
+        ws_raw.cell(row=1, column=idx).value = col_name
+    for row_idx, row in enumerate(df_raw.values, 2):
+        for col_idx, value in enumerate(row, 1):
+            ws_raw.cell(row=row_idx, column=col_idx).value = value
+
+    wb.save(output)
+    return output.getvalue()
+
+
+def sheet_values(xlsx_bytes):
+    wb = load_workbook(BytesIO(xlsx_bytes), read_only=True)
+    return {
+        name: [tuple(row) for row in wb[name].iter_rows(values_only=True)]
+        for name in ("table", "name", "rawdata")
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    new_workbook_from_template()  # 템플릿 파싱은 측정에서 제외
+
+    print(f"{'raw rows':>10}{'legacy (s)':>12}{'stream (s)':>12}{'speedup':>10}{'size (KB)':>11}  parity")
+    for n_rows in args.rows:
+        frames = make_frames(n_rows)
+        fast_bytes, fast = timed(build_workbook_bytes, *frames)
+        if args.skip_legacy:
+            print(f"{n_rows:>10,}{'-':>12}{fast:>12.2f}{'-':>10}{len(fast_bytes) / 1024:>11.0f}  -")
+            continue
+
+        legacy_bytes, legacy = timed(build_workbook_legacy, *frames)
+        parity = "OK" if sheet_values(fast_bytes) == sheet_values(legacy_bytes) else "MISMATCH"
+        print(f"{n_rows:>10,}{legacy:>12.2f}{fast:>12.2f}{legacy / fast:>9.1f}x{len(fast_bytes) / 1024:>11.0f}  {parity}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""fetch_data 전 구간(end-to-end) 오프라인 벤치마크.
+
+bench/fixtures 의 합성 Yahoo chart 응답(yahoo_*.json)과 네이버 환율 페이지(naver_*.html)를
+httpx MockTransport 로 비동기 수집 계층(async_sources)에 그대로 돌려주어 네트워크 없이
+index_list.csv 를 N 종목(13 / 100 / 1000)으로 늘린 목록에 대해
+- cold : 빈 가격 저장소에서 fetch_data 1회 (수집 + 저장 + 계산)
+- warm : 같은 저장소로 다시 fetch_data (저장소 조회 + 계산)
+- excel: build_workbook_bytes
+- raw  : 세션에 보관되는 df_raw(RawPrices) 크기와 long 형식으로 되돌렸을 때의 크기
+- 단계별(timing.span) p50
+을 측정해 표로 출력한다. --save 로 JSON 보고서를 남기고 --baseline 으로 이전 보고서와 비교해
+허용 범위(--tolerance)를 넘게 느려진 항목이 있으면 종료 코드 1.
+
+    python bench/bench_fetch_data.py [--tickers 13 100 1000] [--latency-ms 0] [--save report.json] [--baseline report.json]
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+from urllib.parse import parse_qs, unquote, urlsplit
+
+os.environ.setdefault("TIMING_LOG_LEVEL", "WARNING")
+os.environ["FETCH_BACKEND"] = "async"
+
+import httpx  # noqa: E402
+import pandas as pd  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+sys.path.insert(0, ROOT)
+
+import async_sources  # noqa: E402
+import price_store  # noqa: E402
+import timing  # noqa: E402
+from excel_export import build_workbook_bytes  # noqa: E402
+from report import INDEX_LIST_PATH, fetch_data  # noqa: E402
+
+# fixture 가 담고 있는 기간(2024-04-01 ~ 2025-04-30) 안의 기준일
+REFERENCE_DATE = date(2025, 4, 30)
+COPY_SEPARATOR = "~"
+STAGES = ["prepare_dates", "fetch", "compute_final_panel", "collect_all_data", "sort_final_df", "fetch_data"]
+
+
+def load_fixtures():
+    fixtures = {}
+    for path in glob.glob(os.path.join(FIXTURE_DIR, "yahoo_*.json")):
+        with open(path, "rb") as f:
+            payload = f.read()
+        start = payload.index(b'"symbol":"') + len(b'"symbol":"')
+        fixtures[payload[start:payload.index(b'"', start)].decode()] = payload
+    for path in glob.glob(os.path.join(FIXTURE_DIR, "naver_*.html")):
+        with open(path, "rb") as f:
+            fixtures[os.path.basename(path)[len("naver_"):-len(".html")]] = f.read()
+    return fixtures
+
+
+# index_list.csv 의 종목을 n 개가 될 때까지 복제 (복제본 티커: 원래티커~번호)
+# fixture 는 chart API 응답이므로 yfinance 행은 같은 응답을 쓰는 yahoo_chart 출처로 바꿔 재생 (yf.download 는 httpx 를 쓰지 않음)
+def make_index_list(n, path):
+    index_df = pd.read_csv(INDEX_LIST_PATH)
+    index_df["수집출처"] = index_df["수집출처"].replace("yfinance", "yahoo_chart")
+    copies = [index_df.assign(티커=index_df["티커"] + (f"{COPY_SEPARATOR}{k}" if k else "")) for k in range(-(-n // len(index_df)))]
+    pd.concat(copies, ignore_index=True).head(n).to_csv(path, index=False)
+
+
+def make_transport(fixtures, latency_ms):
+    async def handler(request):
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        url = urlsplit(str(request.url))
+        if url.hostname == "query1.finance.yahoo.com":
+            ticker = unquote(url.path.rsplit("/", 1)[-1])
+        else:
+            ticker = parse_qs(url.query)["marketindexCd"][0]
+        payload = fixtures.get(ticker.split(COPY_SEPARATOR)[0])
+        if payload is None:
+            return httpx.Response(404, request=request)
+        return httpx.Response(200, content=payload, request=request)
+
+    return httpx.MockTransport(handler)
+
+
+def stage_p50():
+    return {f"{s['span']}/{s['source']}" if s["source"] else s["span"]: s["p50_ms"] for s in timing.span_stats()}
+
+
+def run_size(n, workdir):
+    index_path = os.path.join(workdir, f"index_list_{n}.csv")
+    make_index_list(n, index_path)
+    price_store._store = price_store.PriceStore(os.path.join(workdir, f"price_store_{n}.sqlite"))
+
+    timing.reset_spans()
+    start = time.perf_counter()
+    df_final, df_raw, recent_days, _ = fetch_data(REFERENCE_DATE, index_list_path=index_path)
+    cold = time.perf_counter() - start
+    stages = stage_p50()
+
+    start = time.perf_counter()
+    fetch_data(REFERENCE_DATE, index_list_path=index_path)
+    warm = time.perf_counter() - start
+
+    start = time.perf_counter()
+    long_raw = df_raw.to_long()
+    content = build_workbook_bytes(df_final, long_raw, recent_days)
+    excel = time.perf_counter() - start
+
+    missing = int(df_final.iloc[:, 3:].isna().any(axis=1).sum())
+    return {
+        "tickers": n,
+        "rows": len(df_final),
+        "raw_rows": len(df_raw),
+        "missing_rows": missing,
+        "cold_ms": cold * 1000,
+        "warm_ms": warm * 1000,
+        "excel_ms": excel * 1000,
+        "excel_bytes": len(content),
+        "raw_kb": df_raw.nbytes() / 1024,
+        "raw_long_kb": long_raw.memory_usage(deep=True).sum() / 1024,
+        "stages_p50_ms": stages,
+    }
+
+
+def print_report(results):
+    print(f"{'tickers':>8}{'rows':>7}{'raw':>9}{'missing':>9}{'cold (ms)':>12}{'warm (ms)':>12}{'excel (ms)':>12}"
+          f"{'raw (KB)':>11}{'long (KB)':>11}")
+    for r in results:
+        print(f"{r['tickers']:>8}{r['rows']:>7}{r['raw_rows']:>9}{r['missing_rows']:>9}"
+              f"{r['cold_ms']:>12.1f}{r['warm_ms']:>12.1f}{r['excel_ms']:>12.1f}"
+              f"{r['raw_kb']:>11.1f}{r['raw_long_kb']:>11.1f}")
+    print()
+    stages = sorted({s for r in results for s in r["stages_p50_ms"]}, key=lambda s: (STAGES.index(s.split("/")[0]) if s.split("/")[0] in STAGES else len(STAGES), s))
+    print(f"{'stage p50 (ms), cold':<28}" + "".join(f"{r['tickers']:>10}" for r in results))
+    for s in stages:
+        print(f"{s:<28}" + "".join(f"{r['stages_p50_ms'].get(s, float('nan')):>10.1f}" for r in results))
+
+
+# 이전 보고서 대비 cold/warm/excel 시간이 (1 + tolerance) 배를 넘으면 회귀로 판단
+def compare(results, baseline, tolerance):
+    previous = {r["tickers"]: r for r in baseline["results"]}
+    failures = []
+    for r in results:
+        before = previous.get(r["tickers"])
+        if before is None:
+            continue
+        for key in ("cold_ms", "warm_ms", "excel_ms"):
+            if r[key] > before[key] * (1 + tolerance):
+                failures.append(f"{r['tickers']} tickers {key}: {before[key]:.1f} → {r[key]:.1f} ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, nargs="+", default=[13, 100, 1000])
+    parser.add_argument("--latency-ms", type=float, default=0, help="응답마다 더할 가상 네트워크 지연")
+    parser.add_argument("--save", help="JSON 보고서 저장 경로")
+    parser.add_argument("--baseline", help="비교할 이전 JSON 보고서")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    fixtures = load_fixtures()
+    if not fixtures:
+        sys.exit(f"fixture 가 없습니다: {FIXTURE_DIR}")
+    async_sources._client = httpx.AsyncClient(transport=make_transport(fixtures, args.latency_ms))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [run_size(n, workdir) for n in args.tickers]
+    print_report(results)
+
+    report = {"reference_date": str(REFERENCE_DATE), "latency_ms": args.latency_ms, "results": results}
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            failures = compare(results, json.load(f), args.tolerance)
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""네이버 환율 일별 시세(table.tbl_exchange) 파서 벤치마크.
+
+bench/fixtures/naver_*.html (500행 합성 페이지) 에 대해
+BeautifulSoup 파서(parse_naver_quotes)와 빠른 파서(parse_naver_table)의
+결과가 같은지 확인하고 1회 파싱 시간을 비교한다.
+
+    python bench/bench_naver_parser.py [--repeat 20]
+"""
+import argparse
+import glob
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sources import parse_naver_quotes, parse_naver_table  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def check_parity(html):
+    quotes = parse_naver_quotes(html)
+    dates, closes = parse_naver_table(html)
+    expected_dates = np.array([d.date() for d, _ in quotes], dtype="datetime64[D]")
+    expected_closes = np.array([c for _, c in quotes], dtype="float64")
+    assert len(dates) == len(expected_dates) > 0, "행 수가 다릅니다"
+    assert np.array_equal(dates, expected_dates), "날짜가 다릅니다"
+    assert np.array_equal(closes, expected_closes), "종가가 다릅니다"
+    return len(dates)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(FIXTURE_DIR, "naver_*.html")))
+    if not paths:
+        sys.exit(f"fixture 가 없습니다: {FIXTURE_DIR}")
+
+    print(f"{'fixture':<24}{'rows':>6}{'bs4 (ms)':>12}{'fast (ms)':>12}{'speedup':>10}")
+    total_slow = total_fast = 0.0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        rows = check_parity(html)
+        slow = min(timeit.repeat(lambda: parse_naver_quotes(html), number=1, repeat=args.repeat))
+        fast = min(timeit.repeat(lambda: parse_naver_table(html), number=1, repeat=args.repeat))
+        total_slow += slow
+        total_fast += fast
+        print(f"{os.path.basename(path):<24}{rows:>6}{slow * 1000:>12.2f}{fast * 1000:>12.2f}{slow / fast:>9.1f}x")
+
+    print(f"{'total':<24}{'':>6}{total_slow * 1000:>12.2f}{total_fast * 1000:>12.2f}{total_slow / total_fast:>9.1f}x")
+    print("parity: OK")
+
+
+if __name__ == "__main__":
+    main()
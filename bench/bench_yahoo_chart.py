@@ -0,0 +1,109 @@
+"""Yahoo chart API 직접 조회(yahoo_chart) vs yfinance 벤치마크.
+
+bench/fixtures/yahoo_*.json (1년치 일별 chart 합성 응답, bench/fixtures/README.md)을 돌려주는 가짜 HTTP 세션으로
+네트워크 없이 두 출처의 수집 함수를 같은 응답에 대해 실행하고,
+(Date, Close) 결과가 같은지 확인한 뒤 1회 수집 시간, 응답 파싱 시간, 모듈 import 시간을 비교한다.
+
+    python bench/bench_yahoo_chart.py [--repeat 20]
+"""
+import argparse
+import glob
+import os
+import subprocess
+import sys
+import timeit
+import warnings
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import sources  # noqa: E402
+import yfinance as yf  # noqa: E402
+from yahoo_chart import decode_chart, parse_chart  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+START = datetime(2024, 4, 1, tzinfo=ZoneInfo("Asia/Seoul"))
+END = datetime(2025, 5, 1, tzinfo=ZoneInfo("Asia/Seoul"))
+
+
+# chart 요청에는 fixture 를, 그 밖의 요청(yfinance 의 cookie/crumb 등)에는 빈 페이지를 돌려주는 세션
+class FixtureSession(requests.Session):
+    def __init__(self, payload):
+        super().__init__()
+        self.payload = payload
+
+    def request(self, method, url, *args, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = self.payload if "/v8/finance/chart/" in url else b"<html></html>"
+        response.headers["content-type"] = "application/json"
+        return response
+
+
+def import_seconds(module):
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip())
+
+
+def closes_of(frame):
+    frame = frame.dropna(subset=["Close"])
+    return frame["Date"].to_numpy(dtype="datetime64[D]"), frame["Close"].to_numpy(dtype="float64")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    paths = sorted(glob.glob(os.path.join(FIXTURE_DIR, "yahoo_*.json")))
+    if not paths:
+        sys.exit(f"fixture 가 없습니다: {FIXTURE_DIR}")
+
+    print(f"{'import':<24}{'yfinance (ms)':>14}{'yahoo_chart (ms)':>18}")
+    print(f"{'':<24}{import_seconds('yfinance') * 1000:>14.1f}{import_seconds('yahoo_chart') * 1000:>18.1f}")
+    print()
+
+    print(f"{'fixture':<24}{'rows':>6}{'yfinance (ms)':>14}{'yahoo_chart (ms)':>18}{'speedup':>10}"
+          f"{'json (ms)':>11}{'fast (ms)':>11}")
+    for path in paths:
+        with open(path, "rb") as f:
+            payload = f.read()
+        ticker = parse_chart_symbol(payload)
+        session = FixtureSession(payload)
+        yf.data.YfData(session=session)
+        sources._yahoo_session = session
+
+        def run_yfinance():
+            return sources.fetch_from_yfinance(ticker, START, END, "", "", "")
+
+        def run_chart():
+            return sources.fetch_from_yahoo_chart(ticker, START, END, "", "", "")
+
+        expected, actual = closes_of(run_yfinance()), closes_of(run_chart())
+        assert np.array_equal(expected[0], actual[0]), f"{ticker}: 날짜가 다릅니다"
+        assert np.allclose(expected[1], actual[1]), f"{ticker}: 종가가 다릅니다"
+
+        slow = min(timeit.repeat(run_yfinance, number=1, repeat=args.repeat))
+        fast = min(timeit.repeat(run_chart, number=1, repeat=args.repeat))
+        json_parse = min(timeit.repeat(lambda: decode_chart(payload), number=1, repeat=args.repeat))
+        fast_parse = min(timeit.repeat(lambda: parse_chart(payload), number=1, repeat=args.repeat))
+        print(f"{os.path.basename(path):<24}{len(actual[0]):>6}{slow * 1000:>14.2f}{fast * 1000:>18.2f}"
+              f"{slow / fast:>9.1f}x{json_parse * 1000:>11.3f}{fast_parse * 1000:>11.3f}")
+    print("parity: OK")
+
+
+def parse_chart_symbol(payload):
+    start = payload.index(b'"symbol":"') + len(b'"symbol":"')
+    return payload[start:payload.index(b'"', start)].decode()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""첫 화면(first paint)·재실행(rerun) 시간과 첫 화면에서 불러오는 모듈 점검.
+
+조회 결과가 이미 세션에 있는 상태로 AppTest 를 이용해 app.py 를 실행해 (네트워크 없음)
+- 첫 실행 시간 (app.py 가 불러오는 모듈의 import 비용 포함 = cold start)
+- 재실행 시간 (위젯 조작 때마다 반복되는 스크립트 실행)
+- 첫 실행 동안 import 된 모듈 수와 무거운 모듈(수집 출처·엑셀용) 로드 여부
+를 출력한다. 무거운 모듈이 첫 화면에서 로드되거나 시간이 예산을 넘으면 종료 코드 1.
+
+    python bench/check_import_time.py [--reruns 5] [--first-budget-ms 5000] [--rerun-budget-ms 500]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+APP_PATH = os.path.join(ROOT, "app.py")
+
+# 첫 화면에서는 불러오지 않아야 하는 모듈 (수집 출처: 첫 조회 때, openpyxl: 첫 엑셀 생성 때)
+HEAVY_MODULES = ["yfinance", "bs4", "requests", "httpx", "openpyxl", "holidays"]
+
+
+def sample_snapshot():
+    import numpy as np
+    import pandas as pd
+    from raw_prices import RawPrices
+
+    index_df = pd.read_csv(os.path.join(ROOT, "index_list.csv"))
+    days = pd.bdate_range(end="2025-04-30", periods=6)[:-1]
+    headers = ["24년 未", "25.3월"] + [f"{d.month}/{d.day}" for d in days] + ["변동량", "변동률(%)"]
+    rng = np.random.default_rng(0)
+    df_final = pd.DataFrame({"국가": index_df["국가"], "구분": index_df["구분"], "단위": index_df["항목명_짧은"]})
+    for h in headers:
+        df_final[h] = rng.normal(1000, 100, len(index_df))
+    df_raw = RawPrices.from_long(pd.DataFrame({
+        "국가": index_df["국가"], "구분": index_df["구분"], "단위": index_df["항목명_짧은"],
+        "Ticker": index_df["티커"], "Date": pd.Timestamp("2025-04-29"), "Close": 1000.0,
+    }))
+    return df_final, df_raw, list(days)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--first-budget-ms", type=float, default=5000)
+    parser.add_argument("--rerun-budget-ms", type=float, default=500)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    # 백그라운드 미리 조회는 첫 화면 경로가 아니므로 측정에서 제외 (켜 두면 그 스레드가 수집 모듈을 불러옴)
+    os.environ["PREFETCH"] = "0"
+    sys.path.insert(0, ROOT)
+    from streamlit.testing.v1 import AppTest
+
+    already_loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    before = set(sys.modules)
+
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    from snapshot_store import get_snapshot_store
+
+    df_final, df_raw, recent_days = sample_snapshot()
+    at.session_state["snapshot"] = get_snapshot_store().put("sample", df_final, df_raw, recent_days)
+    at.session_state["last_selected_date"] = datetime.now(ZoneInfo("Asia/Seoul")).date()
+    at.session_state["ready"] = True
+    loaded_by_snapshot = set(sys.modules) - before
+
+    start = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - start
+    if at.exception:
+        sys.exit(f"app.py 실행 중 예외: {at.exception}")
+
+    imported = set(sys.modules) - before - loaded_by_snapshot
+    heavy = [name for name in HEAVY_MODULES if name in sys.modules and name not in already_loaded]
+
+    reruns = []
+    for _ in range(args.reruns):
+        start = time.perf_counter()
+        at.run()
+        reruns.append(time.perf_counter() - start)
+    reruns.sort()
+    rerun = reruns[len(reruns) // 2]
+
+    print(f"first paint : {first * 1000:8.1f} ms  (app.py 가 새로 import 한 모듈 {len(imported)}개)")
+    print(f"rerun (p50) : {rerun * 1000:8.1f} ms  ({args.reruns}회)")
+    print(f"heavy       : {', '.join(heavy) if heavy else '-'}")
+
+    failures = []
+    if heavy:
+        failures.append(f"첫 화면에서 무거운 모듈을 불러왔습니다: {', '.join(heavy)}")
+    if first * 1000 > args.first_budget_ms:
+        failures.append(f"첫 화면 {first * 1000:.0f} ms > 예산 {args.first_budget_ms:.0f} ms")
+    if rerun * 1000 > args.rerun_budget_ms:
+        failures.append(f"재실행 {rerun * 1000:.0f} ms > 예산 {args.rerun_budget_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""bench/fixtures/yahoo_*.json 합성(synthetic) fixture 생성기.
+
+실제 Yahoo 응답을 녹화한 것이 아니다. v8 chart 응답과 같은 구조(meta / timestamp / indicators)로
+2024-04-01 ~ 2025-04-30 일별 응답을 만든다.
+- 봉(bar)은 market_calendar 의 시장별 거래일에만 만든다 (주말, 성탄절, 신정, 설 연휴 등 휴장일은 빠짐)
+- timestamp 는 거래소 현지 개장 시각 (미국은 서머타임 반영), meta.timezone 은 현지 시간대 약칭
+- 가격은 시작/끝 수준을 대략 실제 지수대에 맞춘 고정 시드 난수 경로이며 실제 종가가 아니다
+
+    python bench/make_yahoo_fixtures.py
+"""
+import json
+import os
+import sys
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+sys.path.insert(0, ROOT)
+
+from market_calendar import get_market_calendar  # noqa: E402
+
+START = date(2024, 4, 1)
+END = date(2025, 4, 30)
+SEED = 20250430
+
+# 티커: (파일명, 국가, 통화, 거래소, 시간대, 개장, 마감, 시작 수준, 끝 수준)
+SYMBOLS = {
+    "399001.SZ": ("399001_SZ", "중국", "CNY", "SHZ", "Asia/Shanghai", (9, 30), (15, 0), 9500, 9900),
+    "0P0000HY8X.VN": ("0P0000HY8X_VN", "베트남", "VND", "VNM", "Asia/Ho_Chi_Minh", (9, 0), (15, 0), 1280, 1220),
+    "^KS11": ("KS11", "한국", "KRW", "KSC", "Asia/Seoul", (9, 0), (15, 30), 2750, 2560),
+    "^JKSE": ("JKSE", "인니", "IDR", "JKT", "Asia/Jakarta", (9, 0), (16, 0), 7200, 6770),
+    "PSEi.PS": ("PSEi_PS", "필리핀", "PHP", "PHS", "Asia/Manila", (9, 30), (15, 0), 6900, 6350),
+    "^IXIC": ("IXIC", "미국", "USD", "NIM", "America/New_York", (9, 30), (16, 0), 16400, 17450),
+    "^GSPC": ("GSPC", "미국", "USD", "SNP", "America/New_York", (9, 30), (16, 0), 5240, 5570),
+    "^DJI": ("DJI", "미국", "USD", "DJI", "America/New_York", (9, 30), (16, 0), 39570, 40670),
+}
+
+# tzdata 에 약칭이 없는(+07 등) 시간대
+TIMEZONE_ABBR = {"Asia/Ho_Chi_Minh": "ICT"}
+
+
+def _epoch(day, hm, tz):
+    return int(datetime.combine(day, time(*hm), tzinfo=ZoneInfo(tz)).timestamp())
+
+
+def _timezone_abbr(day, tz):
+    return TIMEZONE_ABBR.get(tz) or datetime.combine(day, time(12), tzinfo=ZoneInfo(tz)).tzname()
+
+
+# 시작/끝 수준을 잇는 로그 가격 경로 (브라운 브리지, 일 변동성 약 1%)
+def _closes(rng, n, first, last):
+    steps = rng.normal(0, 0.01, n)
+    walk = np.cumsum(steps) - steps[0]
+    bridge = walk - np.linspace(0, 1, n) * walk[-1]
+    return np.round(np.exp(np.log(first) + np.linspace(0, np.log(last / first), n) + bridge), 6)
+
+
+def build_chart(rng, symbol, country, currency, exchange, tz, open_hm, close_hm, first, last):
+    sessions = get_market_calendar(country, since=START).sessions_between(START, END).date
+    closes = _closes(rng, len(sessions) + 1, first, last)
+    previous_close, closes = closes[0], closes[1:]
+    opens = np.round(np.r_[previous_close, closes[:-1]] * (1 + rng.normal(0, 0.002, len(closes))), 6)
+    highs = np.round(np.maximum(opens, closes) * (1 + np.abs(rng.normal(0, 0.004, len(closes)))), 6)
+    lows = np.round(np.minimum(opens, closes) * (1 - np.abs(rng.normal(0, 0.004, len(closes)))), 6)
+    volumes = rng.integers(100_000_000, 1_000_000_000, len(closes))
+
+    last_day = sessions[-1]
+    offset = int(datetime.combine(last_day, time(12), tzinfo=ZoneInfo(tz)).utcoffset().total_seconds())
+    regular_start, regular_end = _epoch(last_day, open_hm, tz), _epoch(last_day, close_hm, tz)
+
+    def period(start, end):
+        return {"timezone": tz, "start": start, "end": end, "gmtoffset": offset}
+
+    return {"chart": {"result": [{
+        "meta": {
+            "currency": currency, "symbol": symbol, "exchangeName": exchange, "fullExchangeName": exchange,
+            "instrumentType": "INDEX", "firstTradeDate": 946857600, "regularMarketTime": regular_end,
+            "hasPrePostMarketData": False, "gmtoffset": offset, "timezone": _timezone_abbr(last_day, tz),
+            "exchangeTimezoneName": tz, "regularMarketPrice": float(closes[-1]),
+            "chartPreviousClose": float(previous_close), "priceHint": 2,
+            "currentTradingPeriod": {
+                "pre": period(regular_start, regular_start),
+                "regular": period(regular_start, regular_end),
+                "post": period(regular_end, regular_end),
+            },
+            "dataGranularity": "1d", "range": "",
+            "validRanges": ["1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max"],
+        },
+        "timestamp": [_epoch(day, open_hm, tz) for day in sessions],
+        "indicators": {
+            "quote": [{
+                "open": opens.tolist(), "close": closes.tolist(), "low": lows.tolist(),
+                "high": highs.tolist(), "volume": volumes.tolist(),
+            }],
+            "adjclose": [{"adjclose": closes.tolist()}],
+        },
+    }], "error": None}}
+
+
+def main():
+    rng = np.random.default_rng(SEED)
+    for symbol, (name, *spec) in SYMBOLS.items():
+        chart = build_chart(rng, symbol, *spec)
+        path = os.path.join(FIXTURE_DIR, f"yahoo_{name}.json")
+        with open(path, "w") as f:
+            json.dump(chart, f, separators=(",", ":"))
+        print(f"{os.path.basename(path):<28}{len(chart['chart']['result'][0]['timestamp']):>5} bars")
+
+
+if __name__ == "__main__":
+    main()
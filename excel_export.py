@@ -0,0 +1,158 @@
+import copyreg
+import os
+import pickle
+import re
+import threading
+import zipfile
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+# ===========================================
+# ✅ 엑셀 파일 생성
+# ===========================================
+# 템플릿은 프로세스당 한 번만 파싱해 불변(pickle bytes) 원본으로 메모리에 보관하고,
+# 내보낼 때마다 원본에서 메모리상의 사본을 만들어 BytesIO 로 저장한다 (디스크 쓰기 없음).
+# openpyxl 은 첫 내보내기 때 불러온다.
+
+# 경로는 실행 위치(cwd)와 무관하게 이 파일 기준으로 잡는다
+TEMPLATE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "tmp", "국가별 주가환율 테이블 템플릿_edit_v3.xlsx"
+)
+
+_template = None
+_template_lock = threading.Lock()
+
+
+def get_template_prototype():
+    global _template
+    with _template_lock:
+        if _template is None:
+            from openpyxl import load_workbook
+            from openpyxl.utils.indexed_list import IndexedList
+
+            # openpyxl 의 스타일 목록(IndexedList)은 기본 pickle 복원 시 클래스 공용 dict 를 거쳐 항목이 빠지므로
+            # 생성자로 다시 만들도록 등록
+            copyreg.pickle(IndexedList, lambda indexed: (IndexedList, (list(indexed),)))
+            _template = pickle.dumps(load_workbook(TEMPLATE_PATH), protocol=pickle.HIGHEST_PROTOCOL)
+        return _template
+
+
+def new_workbook_from_template():
+    return pickle.loads(get_template_prototype())
+
+
+# ✅ 대량 행 쓰기
+# openpyxl 로는 헤더와 첫 데이터 행(스타일 견본)만 쓰고 저장한 뒤,
+# 나머지 행은 시트 XML 의 <sheetData> 에 직접 이어 붙여(스트리밍) 셀 객체 생성 비용을 없앤다.
+# 견본 행의 셀 스타일(s 속성)을 열마다 그대로 재사용하므로 날짜 서식 등은 openpyxl 이 쓴 것과 같다.
+
+_EXCEL_EPOCH = np.datetime64("1899-12-30")
+_SHEET_DATA_RE = re.compile(r"<sheetData\s*/>|<sheetData>.*</sheetData>", re.S)
+_DIMENSION_RE = re.compile(r'<dimension ref="[^"]*"\s*/>')
+_CELL_STYLE_RE = re.compile(r'<c r="([A-Z]+)2"(?: s="(\d+)")?')
+
+
+def _write_header_and_probe(ws, df):
+    for col_idx, col_name in enumerate(df.columns, 1):
+        ws.cell(row=1, column=col_idx).value = col_name
+    if len(df):
+        for col_idx, value in enumerate(df.iloc[0].tolist(), 1):
+            ws.cell(row=2, column=col_idx).value = None if _is_missing(value) else value
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT
+
+
+# 열 하나를 셀 XML 조각 배열로 변환 (결측값은 빈 문자열 = 셀 생략, 숫자는 openpyxl 과 같은 %.16g)
+def _column_cells(series, letter, style):
+    rows = np.arange(3, len(series) + 3).astype(str)
+    prefix = np.char.add(f'<c r="{letter}', rows)
+    style_attr = f' s="{style}"' if style else ""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = pd.to_datetime(series).dt.tz_localize(None).to_numpy(dtype="datetime64[ns]")
+        missing = np.isnat(values)
+        numbers = (values - _EXCEL_EPOCH) / np.timedelta64(1, "D")
+        open_tag, close_tag, text = f'"{style_attr} t="n"><v>', "</v></c>", np.char.mod("%.16g", np.where(missing, 0, numbers))
+    elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        numbers = series.to_numpy(dtype="float64")
+        missing = ~np.isfinite(numbers)
+        open_tag, close_tag, text = f'"{style_attr} t="n"><v>', "</v></c>", np.char.mod("%.16g", np.where(missing, 0, numbers))
+    else:
+        values = series.tolist()
+        missing = np.array([_is_missing(v) for v in values], dtype=bool)
+        text = np.array(["" if m else escape(str(v)) for v, m in zip(values, missing)], dtype=str)
+        open_tag, close_tag = f'"{style_attr} t="inlineStr"><is><t>', "</t></is></c>"
+    cells = np.char.add(np.char.add(np.char.add(prefix, open_tag), text), close_tag)
+    return np.where(missing, "", cells)
+
+# 3행부터의 데이터를 시트 XML 에 스트리밍으로 추가
+def _stream_rows(sheet_xml, df):
+    from openpyxl.utils import get_column_letter
+
+    head_end = sheet_xml.index("<row r=\"1\"")
+    probe_start = sheet_xml.find("<row r=\"2\"", head_end)
+    probe_end = sheet_xml.index("</row>", probe_start) + len("</row>")
+    styles = dict(_CELL_STYLE_RE.findall(sheet_xml[probe_start:probe_end]))
+
+    rest = df.iloc[1:]
+    letters = [get_column_letter(i) for i in range(1, len(df.columns) + 1)]
+    columns = [_column_cells(rest.iloc[:, i], letter, styles.get(letter)) for i, letter in enumerate(letters)]
+    row_cells = columns[0]
+    for column in columns[1:]:
+        row_cells = np.char.add(row_cells, column)
+    row_numbers = np.arange(3, len(rest) + 3).astype(str)
+    rows_xml = np.char.add(np.char.add(np.char.add('<row r="', row_numbers), '">'), row_cells)
+    rows_xml = np.char.add(rows_xml, "</row>")
+
+    sheet_data = sheet_xml[sheet_xml.index("<sheetData"):sheet_xml.index("</sheetData>")]
+    sheet_data = sheet_data + "".join(rows_xml.tolist()) + "</sheetData>"
+    sheet_xml = _SHEET_DATA_RE.sub(lambda _: sheet_data, sheet_xml, count=1)
+    dimension = f'<dimension ref="A1:{letters[-1]}{len(df) + 1}" />'
+    return _DIMENSION_RE.sub(lambda _: dimension, sheet_xml, count=1)
+
+
+def _replace_sheets(xlsx_bytes, sheet_frames):
+    source = zipfile.ZipFile(BytesIO(xlsx_bytes))
+    output = BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as target:
+        for item in source.infolist():
+            data = source.read(item.filename)
+            if item.filename in sheet_frames:
+                data = _stream_rows(data.decode("utf-8"), sheet_frames[item.filename]).encode("utf-8")
+            target.writestr(item, data)
+    return output.getvalue()
+
+
+def build_workbook_bytes(df_final, df_raw, recent_business_days):
+    output = BytesIO()
+    wb = new_workbook_from_template()
+
+    ws_table = wb["table"]
+    for row in ws_table.iter_rows(min_row=1, max_row=ws_table.max_row, min_col=1, max_col=ws_table.max_column):
+        for cell in row:
+            cell.value = None
+    _write_header_and_probe(ws_table, df_final)
+
+    ws_name = wb["name"]
+    start_day = recent_business_days[0]
+    end_day = recent_business_days[-1]
+    ws_name["A1"] = f"{start_day.month}/{start_day.day}~{end_day.month}/{end_day.day}"
+
+    ws_raw = wb["rawdata"]
+    _write_header_and_probe(ws_raw, df_raw)
+
+    wb.save(output)
+
+    # openpyxl 은 시트를 순서대로 xl/worksheets/sheet{n}.xml 로 저장
+    sheet_frames = {
+        f"xl/worksheets/sheet{wb.worksheets.index(ws) + 1}.xml": df
+        for ws, df in ((ws_table, df_final), (ws_raw, df_raw))
+        if len(df) > 1
+    }
+    if not sheet_frames:
+        return output.getvalue()
+    return _replace_sheets(output.getvalue(), sheet_frames)
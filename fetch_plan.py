@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+# ===========================================
+# ✅ 수집 구간 계획 (보고서에 필요한 날짜만 요청)
+# ===========================================
+# 보고서가 쓰는 값은 기준연말·전달말·최근 5 영업일의 "해당일 이전(≤) 마지막 종가" 뿐이므로
+# 기준일마다 앞쪽 여유(PLAN_PAD_DAYS)를 둔 작은 구간만 받고, 겹치거나 맞닿은 구간은 하나로 합친다.
+# 구간은 (start, end, anchor) 튜플: [start, end) 를 받고, anchor 이전(≤) 값이 하나라도 있어야 한다.
+# 연휴 등으로 anchor 이전 값이 없으면 widen_window 로 앞쪽 여유를 두 배씩 늘려 다시 받는다.
+
+PLAN_PAD_DAYS = 7                        # 주말 + 1~2일 휴장을 덮는 기본 여유
+PLAN_MAX_PAD_DAYS = 56                   # 넓히기 상한 (설·국경절 등 장기 연휴 대비)
+
+
+def _day_start(day, like):
+    return datetime.combine(day, datetime.min.time()).replace(tzinfo=like.tzinfo)
+
+
+def plan_fetch_windows(last_year_end, prev_month_end, recent_days, end_date, pad_days=PLAN_PAD_DAYS):
+    windows = []
+    for anchor in [last_year_end, prev_month_end]:
+        start = _day_start(anchor.date() - timedelta(days=pad_days), end_date)
+        windows.append((start, _day_start(anchor.date() + timedelta(days=1), end_date), anchor))
+    # 최근 영업일 구간은 첫 영업일부터 조회 종료일까지
+    if recent_days:
+        anchor = recent_days[0]
+        windows.append((_day_start(anchor.date() - timedelta(days=pad_days), end_date), end_date, anchor))
+    return merge_windows(windows)
+
+
+# 겹치거나 맞닿은 구간을 합침 (anchor 는 더 이른 쪽 유지)
+def merge_windows(windows):
+    merged = []
+    for start, end, anchor in sorted(windows, key=lambda w: w[0]):
+        if merged and start <= merged[-1][1]:
+            prev_start, prev_end, prev_anchor = merged[-1]
+            merged[-1] = (prev_start, max(prev_end, end), min(prev_anchor, anchor))
+        else:
+            merged.append((start, end, anchor))
+    return merged
+
+
+# 앞쪽 여유를 두 배로 늘린 구간. 상한을 넘으면 None
+def widen_window(window):
+    start, end, anchor = window
+    pad = (anchor.date() - start.date()).days * 2
+    if pad > PLAN_MAX_PAD_DAYS:
+        return None
+    return _day_start(anchor.date() - timedelta(days=pad), start), end, anchor
+
+
+def window_span(windows):
+    return min(w[0] for w in windows), max(w[1] for w in windows)
@@ -0,0 +1,177 @@
+from datetime import date, datetime, time
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+# ===========================================
+# ✅ 시장별 거래일 달력 (키: 국가)
+# ===========================================
+# 국가마다 휴장일을 한 번만 계산해 정렬된 거래일 배열(datetime64[D])로 보관하고,
+# "d 이전(≤) 마지막 거래일", "월말 거래일", "최근 N 거래일" 을 이진 탐색으로 조회한다.
+
+# 기본 달력 범위: (올해 - CALENDAR_YEARS_BACK) 년 1월 1일 ~ 내년 말
+# 보고서는 기준일 이전 1년 남짓만 쓰므로 더 이른 날짜가 필요할 때만(since) 그 연도부터 다시 만든다.
+CALENDAR_YEARS_BACK = 2
+
+# 거래소 휴장일이 있는 시장은 거래소 달력, 없으면 국가 공휴일 달력 사용
+MARKET_HOLIDAYS = {
+    "한국": ("financial", "XKRX"),
+    "중국": ("financial", "XSHG"),
+    "미국": ("financial", "XNYS"),
+    "베트남": ("country", "VN"),
+    "인니": ("country", "ID"),
+    "필리핀": ("country", "PH"),
+}
+
+# 시장별 마감 시각 (현지 시각)
+MARKET_CLOSE = {
+    "한국": (15, 30, "Asia/Seoul"),
+    "베트남": (15, 0, "Asia/Ho_Chi_Minh"),
+    "인니": (16, 0, "Asia/Jakarta"),
+    "필리핀": (15, 0, "Asia/Manila"),
+    "중국": (15, 0, "Asia/Shanghai"),
+    "미국": (16, 0, "America/New_York"),
+}
+
+
+def _to_day(value):
+    if isinstance(value, datetime):
+        return np.datetime64(value.date(), "D")
+    if isinstance(value, date):
+        return np.datetime64(value, "D")
+    return np.datetime64(pd.Timestamp(value).date(), "D")
+
+
+def _holiday_dates(country, years):
+    import holidays
+
+    kind, code = MARKET_HOLIDAYS.get(country, (None, None))
+    if kind == "financial":
+        calendar = holidays.financial_holidays(code, years=years)
+    elif kind == "country":
+        calendar = holidays.country_holidays(code, years=years)
+    else:
+        return np.array([], dtype="datetime64[D]")
+    return np.array(sorted(calendar.keys()), dtype="datetime64[D]")
+
+
+class MarketCalendar:
+    def __init__(self, name, sessions):
+        self.name = name
+        self.sessions = sessions
+
+    def _position(self, d):
+        # d 이전(≤) 마지막 거래일의 위치 (없으면 -1)
+        return int(np.searchsorted(self.sessions, _to_day(d), side="right")) - 1
+
+    def is_session(self, d):
+        pos = self._position(d)
+        return pos >= 0 and self.sessions[pos] == _to_day(d)
+
+    def session_on_or_before(self, d):
+        pos = self._position(d)
+        return pd.Timestamp(self.sessions[pos]) if pos >= 0 else None
+
+    def previous_session(self, d):
+        pos = int(np.searchsorted(self.sessions, _to_day(d), side="left")) - 1
+        return pd.Timestamp(self.sessions[pos]) if pos >= 0 else None
+
+    def next_session(self, d):
+        pos = int(np.searchsorted(self.sessions, _to_day(d), side="right"))
+        return pd.Timestamp(self.sessions[pos]) if pos < len(self.sessions) else None
+
+    # 해당 월의 마지막 거래일 (until 이 주어지면 그 날짜 이전으로 제한)
+    def month_end(self, year, month, until=None):
+        next_month = date(year + month // 12, month % 12 + 1, 1)
+        last_day = np.datetime64(next_month, "D") - 1
+        if until is not None:
+            last_day = min(last_day, _to_day(until))
+        session = self.session_on_or_before(last_day)
+        if session is None or (session.year, session.month) != (year, month):
+            return None
+        return session
+
+    # before 보다 앞선(<) 최근 n 거래일, 오래된 순
+    def last_sessions(self, n, before):
+        end = int(np.searchsorted(self.sessions, _to_day(before), side="left"))
+        return pd.DatetimeIndex(self.sessions[max(0, end - n):end])
+
+    def sessions_between(self, start, end):
+        lo = np.searchsorted(self.sessions, _to_day(start), side="left")
+        hi = np.searchsorted(self.sessions, _to_day(end), side="right")
+        return pd.DatetimeIndex(self.sessions[lo:hi])
+
+
+@lru_cache(maxsize=None)
+def _build_calendar(country, first_year, last_year):
+    weekdays = pd.bdate_range(f"{first_year}-01-01", f"{last_year}-12-31").values.astype("datetime64[D]")
+    closed = _holiday_dates(country, range(first_year, last_year + 1))
+    sessions = weekdays[~np.isin(weekdays, closed)]
+    sessions.flags.writeable = False
+    return MarketCalendar(country, sessions)
+
+
+@lru_cache(maxsize=None)
+def _build_union_calendar(countries, first_year, last_year):
+    sessions = np.unique(np.concatenate([_build_calendar(c, first_year, last_year).sessions for c in countries]))
+    sessions.flags.writeable = False
+    return MarketCalendar("+".join(countries), sessions)
+
+
+# 달력 시작 연도: 기본 범위, since 가 더 이르면 since 의 연도
+def _first_year(since=None):
+    first_year = date.today().year - CALENDAR_YEARS_BACK
+    if since is not None:
+        first_year = min(first_year, pd.Timestamp(_to_day(since)).year)
+    return first_year
+
+
+# 국가별 달력 (등록되지 않은 국가는 월~금 전체를 거래일로 간주). since: 조회할 가장 이른 날짜
+def get_market_calendar(country, since=None):
+    return _build_calendar(country, _first_year(since), date.today().year + 1)
+
+
+# 여러 시장 중 한 곳이라도 열린 날의 달력 (보고서 공통 날짜 축)
+def get_union_calendar(countries, since=None):
+    return _build_union_calendar(tuple(sorted(set(countries))), _first_year(since), date.today().year + 1)
+
+
+# ===========================================
+# ✅ 장 마감 시각 (거래일에만 마감이 있음)
+# ===========================================
+def _close_at(country, day):
+    hour, minute, tz = MARKET_CLOSE[country]
+    return datetime.combine(day, time(hour, minute), tzinfo=ZoneInfo(tz))
+
+
+def _latest_close(country, now):
+    calendar = get_market_calendar(country)
+    session = calendar.session_on_or_before(now.astimezone(ZoneInfo(MARKET_CLOSE[country][2])).date())
+    while session is not None and _close_at(country, session.date()) > now:
+        session = calendar.previous_session(session)
+    return _close_at(country, session.date()) if session is not None else None
+
+
+def _next_close(country, now):
+    calendar = get_market_calendar(country)
+    local_today = now.astimezone(ZoneInfo(MARKET_CLOSE[country][2])).date()
+    session = calendar.session_on_or_before(local_today)
+    if session is None or _close_at(country, session.date()) <= now:
+        session = calendar.next_session(local_today)
+    return _close_at(country, session.date()) if session is not None else None
+
+
+# 현재 시각 이전에 가장 최근 마감한 시장의 마감 시각 (어느 시장이든 마감하면 값이 바뀜)
+def latest_market_close(now=None, countries=MARKET_CLOSE):
+    now = now or datetime.now(ZoneInfo("Asia/Seoul"))
+    closes = [c for c in (_latest_close(country, now) for country in countries) if c is not None]
+    return max(closes).astimezone(ZoneInfo("Asia/Seoul"))
+
+
+# 현재 시각 이후 가장 먼저 마감하는 시장의 마감 시각
+def next_market_close(now=None, countries=MARKET_CLOSE):
+    now = now or datetime.now(ZoneInfo("Asia/Seoul"))
+    closes = [c for c in (_next_close(country, now) for country in countries) if c is not None]
+    return min(closes).astimezone(ZoneInfo("Asia/Seoul"))
@@ -0,0 +1,66 @@
+import contextvars
+import sys
+import threading
+from contextlib import contextmanager
+
+# ===========================================
+# ✅ 수집 경고 전달
+# ===========================================
+# 수집·계산 코드는 st.warning 대신 warn() 을 호출한다.
+# - collect_warnings() 안(배치 실행 등)에서는 경고 문구를 목록으로 모아 데이터로 돌려주고
+# - 그 밖(Streamlit 페이지)에서는 지금처럼 st.warning 으로 화면에 표시한다.
+# track_warnings() 는 전달 대상은 바꾸지 않고 발생한 경고를 따로 기록만 한다 (수집 결과가 온전한지 판단용).
+
+_collector = contextvars.ContextVar("warning_collector", default=None)
+_trackers = contextvars.ContextVar("warning_trackers", default=())
+
+
+def warn(message):
+    for tracker in _trackers.get():
+        tracker.append(message)
+    collector = _collector.get()
+    if collector is not None:
+        collector.append(message)
+        return
+    import streamlit as st
+
+    st.warning(message)
+
+
+@contextmanager
+def collect_warnings():
+    messages = []
+    token = _collector.set(messages)
+    try:
+        yield messages
+    finally:
+        _collector.reset(token)
+
+
+@contextmanager
+def track_warnings():
+    messages = []
+    token = _trackers.set(_trackers.get() + (messages,))
+    try:
+        yield messages
+    finally:
+        _trackers.reset(token)
+
+
+# 작업 스레드에서 실행할 함수에 호출한 쪽의 경고 수집기(contextvars)와 Streamlit 세션 컨텍스트를 이어 붙임
+def bind_context(fn):
+    context = contextvars.copy_context()
+    script_ctx = None
+    if "streamlit" in sys.modules:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        script_ctx = get_script_run_ctx(suppress_warning=True)
+
+    def run(*args, **kwargs):
+        if script_ctx is not None:
+            from streamlit.runtime.scriptrunner import add_script_run_ctx
+
+            add_script_run_ctx(threading.current_thread(), script_ctx)
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run
@@ -0,0 +1,66 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from market_calendar import next_market_close
+
+# ===========================================
+# ✅ 백그라운드 미리 조회 (프로세스당 하나)
+# ===========================================
+# 시작 직후 한 번, 이후 시장이 마감할 때마다(원천 반영 여유 PREFETCH_DELAY 후) 오늘 기준일의 결과를 미리 계산해
+# 공용 캐시를 채워 둔다. 실제 계산(warm)은 app.py 가 넘겨주는 함수가 담당한다.
+
+PREFETCH_DELAY = timedelta(minutes=5)
+PREFETCH_RETRY = timedelta(minutes=10)
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchScheduler:
+    def __init__(self, warm, delay=PREFETCH_DELAY, retry=PREFETCH_RETRY):
+        self._warm = warm
+        self._delay = delay
+        self._retry = retry
+        self._stop = threading.Event()
+        self._thread = None
+        self.status = {"runs": 0, "last_run": None, "last_error": None, "next_run": None}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    # 다음 실행 시각: 다음 장 마감 + 여유, 직전 실행이 실패했으면 재시도 간격과 비교해 더 이른 쪽
+    def next_run(self, now, failed=False):
+        next_run = next_market_close(now) + self._delay
+        if failed:
+            next_run = min(next_run, now + self._retry)
+        return next_run
+
+    def run_once(self):
+        now = datetime.now(ZoneInfo("Asia/Seoul"))
+        try:
+            self._warm(now.date())
+        except Exception as e:
+            logger.exception("미리 조회 실패 (기준일 %s)", now.date())
+            self.status["last_error"] = f"{type(e).__name__}: {e}"
+            return False
+        self.status["runs"] += 1
+        self.status["last_run"] = now
+        self.status["last_error"] = None
+        return True
+
+    def _run(self):
+        ok = self.run_once()
+        while True:
+            now = datetime.now(ZoneInfo("Asia/Seoul"))
+            next_run = self.next_run(now, failed=not ok)
+            self.status["next_run"] = next_run
+            if self._stop.wait(max((next_run - now).total_seconds(), 0)):
+                return
+            ok = self.run_once()
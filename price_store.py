@@ -0,0 +1,174 @@
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+# ===========================================
+# ✅ 로컬 가격 저장소 (SQLite, Ticker/Date 키)
+# ===========================================
+# prices         : 티커별 일별 종가
+# coverage_ranges: 티커별 수집 완료 구간 [start_date, covered_until) 목록 (겹치거나 맞닿은 구간은 합쳐 보관)
+#   - covered_until : 이 날짜 "전날"까지는 확정 종가로 간주 (이후 날짜는 다음 조회 때 다시 받음)
+#   - 원천이 아직 올리지 않은 거래일(마지막으로 받은 날짜 뒤의 거래일)은 수집 완료로 기록하지 않음
+#   - 보고서에 필요한 작은 구간만 받으므로(fetch_plan) 티커 하나에 여러 구간이 있을 수 있음
+
+# 기본 경로는 실행 위치(cwd)와 무관하게 이 파일 기준 (환경변수로 바꿀 수 있음)
+PRICE_STORE_PATH = os.environ.get(
+    "PRICE_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tmp", "price_store.sqlite")
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    ticker TEXT NOT NULL,
+    date   TEXT NOT NULL,
+    close  REAL,
+    PRIMARY KEY (ticker, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage_ranges (
+    ticker        TEXT NOT NULL,
+    start_date    TEXT NOT NULL,
+    covered_until TEXT NOT NULL,
+    PRIMARY KEY (ticker, start_date)
+) WITHOUT ROWID;
+"""
+
+
+def _final_until():
+    # 장 마감 시각이 시장마다 달라 오늘·어제 종가는 잠정치로 보고, 그 전날까지만 확정으로 기록
+    return datetime.now(ZoneInfo("Asia/Seoul")).date() - timedelta(days=1)
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+# 받은 마지막 날짜(없으면 요청 시작일 전날) 다음의 첫 거래일: 이 날부터는 원천에 아직 값이 없으므로 다음 조회 때 다시 받음
+# (지연 고시되는 펀드 기준가·환율, 빈 응답 등). 그 사이의 주말·휴장일은 수집 완료로 기록
+def _first_unpublished(rows, fetch_start, calendar=None):
+    last = max(_to_date(d) for _, d, _ in rows) if rows else fetch_start - timedelta(days=1)
+    if calendar is None:
+        return np.busday_offset(np.datetime64(last + timedelta(days=1), "D"), 0, roll="forward").astype(date)
+    session = calendar.next_session(last)
+    return session.date() if session is not None else date.max
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for start, until in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], until))
+        else:
+            merged.append((start, until))
+    return merged
+
+
+class PriceStore:
+    def __init__(self, path=PRICE_STORE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    # 수집 완료 구간 [(start, covered_until), ...] (시작일 순)
+    def coverage(self, ticker):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT start_date, covered_until FROM coverage_ranges WHERE ticker = ? ORDER BY start_date", (ticker,)
+            ).fetchall()
+        return [(_to_date(start), _to_date(until)) for start, until in rows]
+
+    def last_date(self, ticker):
+        with self._lock:
+            last_date = self._conn.execute("SELECT MAX(date) FROM prices WHERE ticker = ?", (ticker,)).fetchone()[0]
+        return _to_date(last_date) if last_date else None
+
+    # 요청 구간 [start, end) 중 원천에서 받아야 하는 구간 (빈 곳들을 모두 덮는 하나의 구간). 모두 저장되어 있으면 None
+    def missing_range(self, ticker, start, end):
+        start, end = _to_date(start), _to_date(end)
+        gaps = []
+        cursor = start
+        for range_start, until in self.coverage(ticker):
+            if until <= cursor or range_start >= end:
+                continue
+            if range_start > cursor:
+                gaps.append((cursor, range_start))
+            cursor = max(cursor, until)
+        if cursor < end:
+            gaps.append((cursor, end))
+        if not gaps:
+            return None
+        return gaps[0][0], gaps[-1][1]
+
+    # calendar: 티커 시장의 거래일 달력 (market_calendar.MarketCalendar, 없으면 월~금 전체를 거래일로 간주)
+    def save(self, ticker, frame, fetch_start, fetch_end, calendar=None):
+        fetch_start, fetch_end = _to_date(fetch_start), _to_date(fetch_end)
+        frame = frame.dropna(subset=["Close"])
+        rows = [
+            (ticker, pd.Timestamp(d).date().isoformat(), float(c))
+            for d, c in zip(frame["Date"], frame["Close"])
+        ]
+        covered_until = min(fetch_end, _final_until(), _first_unpublished(rows, fetch_start, calendar))
+
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO prices (ticker, date, close) VALUES (?, ?, ?)", rows)
+            if fetch_start >= covered_until:
+                return
+            ranges = [
+                (_to_date(start), _to_date(until))
+                for start, until in self._conn.execute(
+                    "SELECT start_date, covered_until FROM coverage_ranges WHERE ticker = ?", (ticker,)
+                )
+            ]
+            ranges = _merge_ranges(ranges + [(fetch_start, covered_until)])
+            self._conn.execute("DELETE FROM coverage_ranges WHERE ticker = ?", (ticker,))
+            self._conn.executemany(
+                "INSERT INTO coverage_ranges (ticker, start_date, covered_until) VALUES (?, ?, ?)",
+                [(ticker, start.isoformat(), until.isoformat()) for start, until in ranges],
+            )
+
+    def has_data(self, ticker, start, end):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM prices WHERE ticker = ? AND date >= ? AND date < ? AND close IS NOT NULL LIMIT 1",
+                (ticker, _to_date(start).isoformat(), _to_date(end).isoformat()),
+            ).fetchone()
+        return row is not None
+
+    # 여러 구간 [start, end) 의 값을 한 번의 조회로 → (날짜 datetime64[D] 배열, 종가 float64 배열), 날짜순·중복 없음
+    def load_ranges(self, ticker, ranges):
+        if not ranges:
+            return np.array([], dtype="datetime64[D]"), np.array([], dtype="float64")
+        where = " OR ".join(["(date >= ? AND date < ?)"] * len(ranges))
+        params = [ticker] + [_to_date(d).isoformat() for start, end in ranges for d in (start, end)]
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT date, close FROM prices WHERE ticker = ? AND close IS NOT NULL AND ({where}) ORDER BY date",
+                params,
+            ).fetchall()
+        return (
+            np.array([r[0] for r in rows], dtype="datetime64[D]"),
+            np.array([r[1] for r in rows], dtype="float64"),
+        )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+# 프로세스 전체에서 하나의 저장소를 공유
+def get_price_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PriceStore()
+        return _store
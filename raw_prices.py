@@ -0,0 +1,101 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# ===========================================
+# ✅ 원시 가격 데이터(df_raw)의 압축 표현
+# ===========================================
+# 일별 행마다 반복되던 국가·구분·단위·Ticker 문자열은 종목당 한 번만(meta) 보관하고,
+# 종가는 날짜 × 종목 float64 행렬 하나(+ 해당 행이 있었는지 표시하는 bool 행렬)로 들고 있다.
+# 수집 구간이 종목마다 같으므로 날짜 축이 짧아 long 형식보다 훨씬 작다.
+# 엑셀 rawdata 시트 등 기존 long 형식이 필요할 때만 to_long() 으로 되돌린다.
+
+RAW_COLUMNS = ["국가", "구분", "단위", "Ticker", "Date", "Close"]
+META_COLUMNS = ["국가", "구분", "단위", "Ticker"]
+
+
+class RawPrices:
+    def __init__(self, meta, days, closes, present):
+        self.meta = meta.reset_index(drop=True)
+        self.days = np.asarray(days, dtype="datetime64[D]")
+        self.closes = np.asarray(closes, dtype="float64").reshape(len(self.days), len(self.meta))
+        self.present = np.asarray(present, dtype=bool).reshape(self.closes.shape)
+
+    @classmethod
+    def empty(cls):
+        return cls(pd.DataFrame(columns=META_COLUMNS), [], [], [])
+
+    # 종목별 long 형식 DataFrame 목록(collect_all_data 의 수집 결과) → RawPrices
+    # 같은 티커가 여러 번 나오면 한 종목으로 합치고, 같은 날짜는 나중 값을 사용
+    @classmethod
+    def from_frames(cls, frames):
+        frames = [frame for frame in frames if frame is not None and not frame.empty]
+        if not frames:
+            return cls.empty()
+
+        positions, meta_rows = {}, []
+        for frame in frames:
+            ticker = frame["Ticker"].iat[0]
+            if ticker not in positions:
+                positions[ticker] = len(meta_rows)
+                meta_rows.append(frame[META_COLUMNS].iloc[0].tolist())
+
+        frame_days = [pd.to_datetime(frame["Date"]).to_numpy(dtype="datetime64[D]") for frame in frames]
+        days = np.unique(np.concatenate(frame_days))
+        closes = np.full((len(days), len(meta_rows)), np.nan)
+        present = np.zeros(closes.shape, dtype=bool)
+        for frame, dates in zip(frames, frame_days):
+            rows = np.searchsorted(days, dates)
+            column = positions[frame["Ticker"].iat[0]]
+            closes[rows, column] = frame["Close"].to_numpy(dtype="float64")
+            present[rows, column] = True
+        return cls(pd.DataFrame(meta_rows, columns=META_COLUMNS), days, closes, present)
+
+    @classmethod
+    def from_long(cls, df):
+        if df is None or df.empty:
+            return cls.empty()
+        return cls.from_frames([group for _, group in df.groupby("Ticker", sort=False)])
+
+    def __len__(self):
+        return int(self.present.sum())
+
+    @property
+    def is_empty(self):
+        return not self.present.any()
+
+    @property
+    def tickers(self):
+        return self.meta["Ticker"].tolist()
+
+    # 기존 df_raw 와 같은 long 형식 (종목 순 → 날짜 순, 열 순서 RAW_COLUMNS)
+    def to_long(self):
+        if self.is_empty:
+            return pd.DataFrame(columns=RAW_COLUMNS)
+        columns, rows = np.nonzero(self.present.T)
+        df = self.meta.iloc[columns].reset_index(drop=True)
+        df["Date"] = self.days[rows].astype("datetime64[ns]")
+        df["Close"] = self.closes[rows, columns]
+        return df[RAW_COLUMNS]
+
+    # Date × Ticker 종가 행렬 (종가가 하나도 없는 날짜는 제외)
+    def panel(self):
+        valid = ~np.isnan(self.closes).all(axis=1)
+        return pd.DataFrame(
+            self.closes[valid],
+            index=pd.DatetimeIndex(self.days[valid].astype("datetime64[ns]"), name="Date"),
+            columns=pd.Index(self.tickers, name="Ticker"),
+        )
+
+    # 메모리 사용량 (bytes): 행렬 + 종목 메타
+    def nbytes(self):
+        return self.days.nbytes + self.closes.nbytes + self.present.nbytes + int(self.meta.memory_usage(deep=True).sum())
+
+    # 내용 해시용 bytes (snapshot_hash)
+    def fingerprint(self):
+        digest = hashlib.sha256()
+        digest.update(repr(self.meta.to_numpy().tolist()).encode())
+        for values in (self.days, self.present, np.where(self.present, self.closes, 0.0)):
+            digest.update(values.tobytes())
+        return digest.digest()
@@ -0,0 +1,374 @@
+import argparse
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from fetch_plan import plan_fetch_windows
+from market_calendar import get_market_calendar, get_union_calendar
+from notices import bind_context, collect_warnings, track_warnings, warn
+from raw_prices import RawPrices
+from timing import span
+
+# Streamlit 없이도 쓰는 조회·계산 파이프라인 (app.py 화면과 배치 실행이 함께 사용)
+# 배치 실행: python report.py 2025-04-30 [2025-04-29 ...] [--out ./out]
+
+# ===========================================
+# ✅ 함수: 데이터 수집
+# ===========================================
+# 무거운 모듈(yfinance·bs4·requests·httpx·openpyxl)은 첫 화면에 필요 없으므로
+# 수집 출처는 첫 수집 때, openpyxl 은 첫 엑셀 생성 때 함수 안에서 불러온다.
+
+# 종목 목록은 실행 위치(cwd)와 무관하게 이 파일 옆의 index_list.csv
+INDEX_LIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "index_list.csv")
+
+# 날짜 계산
+# def prepare_dates(selected_date):
+#     기준일 = datetime.combine(selected_date, datetime.min.time()).replace(tzinfo=ZoneInfo("Asia/Seoul"))
+#     start_date = 기준일 - timedelta(days=370)
+    
+#     # ✅ UTC 기준 시간 문제 방지: 오늘 날짜까지만 요청
+#     # today_utc = datetime.utcnow().date()
+#     # end_date = min(기준일 + timedelta(days=1), today_utc)
+#     end_date = 기준일 + timedelta(days=1)
+#     return 기준일, start_date, end_date
+
+def prepare_dates(selected_date):
+    기준일 = datetime.combine(selected_date, datetime.min.time()).replace(tzinfo=ZoneInfo("Asia/Seoul"))
+    start_date = 기준일 - timedelta(days=370)
+
+    # ✅ 오늘(UTC 기준)을 datetime 형식으로 변환
+    today_utc = datetime.utcnow().replace(tzinfo=ZoneInfo("UTC"))
+    today_utc_local = today_utc.astimezone(ZoneInfo("Asia/Seoul")).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    # ✅ 기준일 다음날과 오늘(로컬 기준) 중 작은 값으로 제한
+    end_date = min(기준일 + timedelta(days=1), today_utc_local)
+
+    return 기준일, start_date, end_date
+
+# 영업일 추출 (대상 시장 중 한 곳이라도 열린 날, 시장별 휴장일 달력 기준)
+def get_business_days(start_date, end_date, countries=None):
+    calendar = get_union_calendar(COUNTRY_ORDER if countries is None else countries, since=start_date)
+    business_days = calendar.sessions_between(start_date, end_date)
+    if getattr(start_date, "tzinfo", None) is not None:
+        business_days = business_days.tz_localize(start_date.tzinfo)
+    return business_days
+
+# 기준일 기준 기준연말, 전달말, 최근 5일 + 헤더 텍스트 (정렬된 영업일에서 이진 탐색)
+def get_reference_dates(기준일, business_days):
+    last_year = 기준일.year - 1
+    year_start = 기준일.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    last_year_end = business_days[business_days.searchsorted(year_start, side="left") - 1]
+
+    prev_month = 기준일.month - 1 if 기준일.month > 1 else 12
+    month_start = year_start.replace(month=기준일.month)
+    prev_month_end = business_days[business_days.searchsorted(month_start, side="left") - 1]
+
+    end = business_days.searchsorted(기준일, side="left")
+    recent_days = list(business_days[max(0, end - 5):end])
+
+    weekday_map = {0: "월", 1: "화", 2: "수", 3: "목", 4: "금", 5: "토", 6: "일"}
+    headers = [
+        f"{last_year % 100}년 未",
+        f"{기준일.year % 100}.{prev_month}월",
+    ] + [f"{d.month}/{d.day}({weekday_map[d.weekday()]})" for d in recent_days] + ["변동량", "변동률(%)"]
+
+    return last_year_end, prev_month_end, recent_days, headers
+
+# csv 로딩
+def load_index_list(path):
+    return pd.read_csv(path)
+
+# def download_and_clean_ticker_data(ticker, start_date, end_date, row_meta):
+#     try:
+#         data = yf.download(
+#             ticker,
+#             start=start_date.strftime("%Y-%m-%d"),
+#             end=end_date.strftime("%Y-%m-%d"),
+#             progress=False
+#         )
+
+#         if data.empty or 'Close' not in data.columns:
+#             return None
+
+#         data = data.reset_index()
+#         data.columns = ["Date", "Close", "Open", "High", "Low", "Volume"]
+#         data["국가"] = row_meta["국가"]
+#         data["구분"] = row_meta["구분"]
+#         data["단위"] = row_meta["항목명_짧은"]
+#         data["Ticker"] = row_meta["티커"]
+
+#         return data[["국가", "구분", "단위", "Ticker", "Date", "Close", "Open", "High", "Low", "Volume"]]
+
+#     except Exception as e:
+#         st.warning(f"{ticker} 에러: {e}")
+#         return None
+
+# 전체 데이터 수집 및 조합
+# ✅ 동시 수집 설정: 전체 워커 수 + 출처별 동시 요청 상한
+MAX_FETCH_WORKERS = 16
+SOURCE_CONCURRENCY = {"yfinance": 8, "yahoo_chart": 8, "naver": 5}
+
+# 수집 방식: "async" = 공용 이벤트 루프에서 전 종목 동시 수집 (async_sources, yfinance 는 작업 스레드에서 일괄 조회)
+#           "threads" = 스레드 풀 + yf.download 일괄 조회
+FETCH_BACKEND = os.environ.get("FETCH_BACKEND", "async")
+
+# 두 방식 모두 수집이 끝나는 순서대로 (index_df 내 위치, 수집 결과) 를 내보냄
+def iter_fetch_async(index_df, windows):
+    from async_sources import iter_rows_async
+
+    rows = [row for _, row in index_df.iterrows()]
+    warnings = []
+    yield from iter_rows_async(rows, windows, warnings)
+    for message in warnings:
+        warn(message)
+
+def iter_fetch_parallel(index_df, windows):
+    from concurrent.futures import as_completed
+
+    from sources import BATCH_SOURCES, fetch_batch_windows_by_source, fetch_price_windows_by_source
+
+    rows = [row for _, row in index_df.iterrows()]
+    if not rows:
+        return
+
+    source_limits = {source: threading.BoundedSemaphore(limit) for source, limit in SOURCE_CONCURRENCY.items()}
+
+    # 일괄 조회 가능한 출처(yfinance)는 출처별로 묶어 한 번에 요청
+    batch_groups = {}
+    for position, row in enumerate(rows):
+        source = row.get("수집출처", "yfinance")
+        if source in BATCH_SOURCES:
+            batch_groups.setdefault(source, []).append(position)
+
+    def fetch_one(row):
+        source = row.get("수집출처", "yfinance")
+        with source_limits.get(source, nullcontext()), span("fetch", source=source, ticker=row["티커"], backend="threads"):
+            return fetch_price_windows_by_source(row["티커"], windows, row)
+
+    def fetch_batch(source, positions):
+        batch = [rows[i] for i in positions]
+        with span("fetch_batch", source=source, ticker=",".join(row["티커"] for row in batch), backend="threads"):
+            return fetch_batch_windows_by_source(source, batch, windows)
+
+    # 워커 스레드의 경고도 호출한 쪽(경고 수집기 또는 현재 Streamlit 세션)으로 전달
+    fetch_one, fetch_batch = bind_context(fetch_one), bind_context(fetch_batch)
+    with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(rows))) as executor:
+        futures = {executor.submit(fetch_batch, source, positions): positions for source, positions in batch_groups.items()}
+        batched = {i for positions in batch_groups.values() for i in positions}
+        futures.update({executor.submit(fetch_one, row): i for i, row in enumerate(rows) if i not in batched})
+
+        for future in as_completed(futures):
+            if isinstance(futures[future], list):
+                results = future.result()
+                for position in futures[future]:
+                    yield position, results.get(rows[position]["티커"])
+            else:
+                yield futures[future], future.result()
+
+# 열(종목)마다 값이 있는 마지막 두 행의 값 → (직전 값, 마지막 값). 값이 두 개 미만이면 NaN
+def _last_two_observations(closes):
+    found = []
+    valid = ~np.isnan(closes)
+    columns = np.arange(closes.shape[1])
+    for _ in range(2):
+        if len(closes) == 0:
+            found.append(np.full(len(columns), np.nan))
+            continue
+        last = len(closes) - 1 - np.argmax(valid[::-1], axis=0)
+        found.append(np.where(valid[last, columns], closes[last, columns], np.nan))
+        valid[last, columns] = False
+    return found[1], found[0]
+
+# ✅ 전 종목 일괄 계산: df_raw 를 Date × Ticker 행렬로 펼쳐 기준일 값·변동량·변동률을 배열 연산으로 산출
+def compute_final_panel(df_raw, index_df, business_days, last_year_end, prev_month_end, recent_days, headers):
+    value_headers = headers[:-2]
+    if df_raw.is_empty:
+        return pd.DataFrame(columns=["국가", "구분", "단위"] + headers)
+
+    panel = df_raw.panel()
+
+    # 수집된 티커만, index_list.csv 순서대로
+    tickers = [t for t in index_df["티커"] if t in panel.columns]
+    meta = index_df.drop_duplicates(subset="티커").set_index("티커").loc[tickers]
+
+    # 변동량·변동률
+    # - 주가: 시장별 달력의 마지막 거래일과 직전 거래일을 비교 (휴장일의 직전 값 중복을 변동 0 으로 보지 않음)
+    # - 환율 등 나머지: 거래소 휴장일에도 고시되므로 종목별로 마지막 최근 영업일 이전 실제 값 두 개를 비교
+    is_stock = meta["구분"].to_numpy() == "주가"
+    change_dates = {}
+    if len(value_headers) >= 7:
+        for country in meta.loc[is_stock, "국가"].unique():
+            calendar = get_market_calendar(country, since=business_days[0])
+            day_1 = calendar.session_on_or_before(recent_days[-1])
+            day_2 = calendar.previous_session(day_1) if day_1 is not None else None
+            if day_2 is not None:
+                change_dates[country] = (day_2, day_1)
+
+    observed = panel.loc[:pd.Timestamp(recent_days[-1].date())] if recent_days else panel
+
+    # 영업일 그리드에 맞춰 직전 값으로 채운 뒤 기준일 행만 추출 (기준일 이전 마지막 값 = as-of)
+    ref_dates = pd.DatetimeIndex([d.date() for d in [last_year_end, prev_month_end] + recent_days])
+    grid = pd.DatetimeIndex(pd.DatetimeIndex(business_days).date)
+    extra = pd.DatetimeIndex([d.date() for pair in change_dates.values() for d in pair]).unique()
+    panel = panel.reindex(panel.index.union(grid).union(ref_dates.unique()).union(extra)).ffill()
+    column_pos = panel.columns.get_indexer(tickers)
+    values = panel.reindex(ref_dates).to_numpy(dtype=float).T[column_pos]      # (Ticker × 기준일)
+
+    df_final = pd.DataFrame({
+        "국가": meta["국가"].to_numpy(),
+        "구분": meta["구분"].to_numpy(),
+        "단위": meta["항목명_짧은"].to_numpy(),
+    })
+    for i, h in enumerate(value_headers):
+        df_final[h] = values[:, i]
+
+    if len(value_headers) >= 7:
+        day_1 = values[:, 6].copy()
+        day_2 = values[:, 5].copy()
+        closes = panel.to_numpy(dtype=float)
+        for country, (date_2, date_1) in change_dates.items():
+            rows = np.flatnonzero(is_stock & (meta["국가"].to_numpy() == country))
+            day_1[rows] = closes[panel.index.get_loc(date_1), column_pos[rows]]
+            day_2[rows] = closes[panel.index.get_loc(date_2), column_pos[rows]]
+        others = np.flatnonzero(~is_stock)
+        observed_closes = observed.to_numpy(dtype=float)[:, observed.columns.get_indexer(meta.index[others])]
+        day_2[others], day_1[others] = _last_two_observations(observed_closes)
+        valid = ~np.isnan(day_1) & ~np.isnan(day_2) & (day_2 != 0)
+        diff = np.where(valid, day_1 - day_2, np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = np.where(valid, diff / day_2 * 100, np.nan)
+    else:
+        diff = rate = np.full(len(tickers), np.nan)
+    df_final["변동량"] = diff
+    df_final["변동률(%)"] = rate
+    return df_final
+
+# ✅ 기준연말·전달말·최근 영업일 주변의 작은 구간만 수집 (fetch_plan)
+# on_record 가 주어지면 종목 수집이 끝날 때마다 그 종목의 결과 행을 on_record(index_df 내 위치, 행 dict) 로 전달
+def collect_all_data(index_df, start_date, end_date, last_year_end, prev_month_end, recent_days, headers, business_days=None, on_record=None):
+    if business_days is None:
+        business_days = get_business_days(start_date, end_date)
+
+    windows = plan_fetch_windows(last_year_end, prev_month_end, recent_days, end_date)
+    if FETCH_BACKEND == "async":
+        fetched = iter_fetch_async(index_df, windows)
+    else:
+        fetched = iter_fetch_parallel(index_df, windows)
+
+    results = [None] * len(index_df)
+    for position, data in fetched:
+        if data is None:
+            continue
+
+        data.columns = ["국가", "구분", "단위", "Ticker", "Date", "Close"]
+        results[position] = data
+        if on_record is not None:
+            record = compute_final_panel(RawPrices.from_frames([data]), index_df.iloc[[position]], business_days, last_year_end, prev_month_end, recent_days, headers)
+            if not record.empty:
+                on_record(position, record.iloc[0].to_dict())
+
+    # 수집 결과가 없는 종목은 호출한 쪽에서 직접 경고 (다른 조회와 합쳐진 수집이 실패하면 그 경고는 먼저 요청한 쪽에만 남음)
+    # → 빠진 종목이 있는 결과는 항상 issues 에 기록되어 불완전한 결과로 판단됨
+    for position in np.flatnonzero([data is None for data in results]):
+        warn(f"⚠️ {index_df.iloc[position]['티커']}: 데이터를 수집하지 못해 결과에서 제외했습니다.")
+
+    # df_raw 는 완료 순서와 무관하게 입력(index_list.csv) 순서대로, 종목 정보는 한 번만 담은 압축 표현(RawPrices)으로
+    df_raw = RawPrices.from_frames(results)
+    with span("compute_final_panel", rows=len(df_raw)):
+        df_final = compute_final_panel(df_raw, index_df, business_days, last_year_end, prev_month_end, recent_days, headers)
+    return df_final, df_raw
+
+# 결과 정렬 (국가·구분 순서를 순서형 범주로 두고 안정 정렬)
+COUNTRY_ORDER = ["베트남", "인니", "한국", "필리핀", "중국", "미국"]
+CATEGORY_ORDER = ["주가", "환율"]
+
+def sort_final_df(df_final):
+    if not df_final.empty:
+        sort_keys = pd.DataFrame({
+            "국가": pd.Categorical(df_final["국가"], categories=COUNTRY_ORDER, ordered=True),
+            "구분": pd.Categorical(df_final["구분"], categories=CATEGORY_ORDER, ordered=True),
+        }, index=df_final.index)
+        order = sort_keys.sort_values(["국가", "구분"], kind="stable").index
+        df_final = df_final.loc[order].reset_index(drop=True)
+    return df_final
+
+# ✅ 메인 함수
+# 단계별 소요 시간은 timing.span 으로 기록 (화면 하단 디버그 패널: ?debug=1)
+# 수집 실패는 예외 대신 경고(notices.warn)로 남으므로, 이번 조회 중 발생한 경고 문구 목록(issues)을 함께 반환
+# → issues 가 비어 있지 않으면 일부 종목이 빠졌거나 불완전한 결과 (캐시에 오래 보관하지 않음)
+def fetch_data(selected_date, on_record=None, index_list_path=None):
+    with span("fetch_data", date=selected_date), track_warnings() as issues:
+        with span("prepare_dates"):
+            기준일, start_date, end_date = prepare_dates(selected_date)
+            index_df = load_index_list(index_list_path or INDEX_LIST_PATH)
+            business_days = get_business_days(start_date, 기준일, index_df["국가"].unique())
+            last_year_end, prev_month_end, recent_days, headers = get_reference_dates(기준일, business_days)
+        with span("collect_all_data", tickers=len(index_df), backend=FETCH_BACKEND):
+            df_final, df_raw = collect_all_data(index_df, start_date, end_date, last_year_end, prev_month_end, recent_days, headers, business_days, on_record)
+        with span("sort_final_df"):
+            df_final = sort_final_df(df_final)
+    return df_final, df_raw, recent_days, issues
+
+
+# ===========================================
+# ✅ 배치 실행 (Streamlit 없이 기준일별 엑셀 파일 생성)
+# ===========================================
+REPORT_FILE_NAME = "국가별_주가환율정보_{date:%y%m%d}.xlsx"
+
+def report_file_name(selected_date):
+    return REPORT_FILE_NAME.format(date=selected_date)
+
+# 기준일 하나의 엑셀 파일을 만들어 저장 → (파일 경로, 경고 문구 목록). 데이터가 없으면 경로는 None
+def write_report(selected_date, out_dir=".", index_list_path=None):
+    from excel_export import build_workbook_bytes
+
+    with collect_warnings() as warnings:
+        df_final, df_raw, recent_days, _ = fetch_data(selected_date, index_list_path=index_list_path)
+    if df_final.empty:
+        warnings.append(f"⚠️ {selected_date}: 조회된 데이터가 없어 파일을 만들지 않았습니다.")
+        return None, warnings
+
+    with span("build_workbook", rows=len(df_raw)):
+        content = build_workbook_bytes(df_final, df_raw.to_long(), recent_days)
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, report_file_name(selected_date))
+    with open(path, "wb") as f:
+        f.write(content)
+    return path, warnings
+
+# 여러 기준일을 차례로 처리 (가격 저장소를 공유하므로 뒤 기준일은 겹치는 구간을 다시 받지 않음)
+# → 기준일별 {"date", "path", "warnings", "error"} 목록
+def write_reports(dates, out_dir=".", index_list_path=None):
+    results = []
+    for selected_date in dates:
+        try:
+            path, warnings = write_report(selected_date, out_dir, index_list_path)
+            results.append({"date": selected_date, "path": path, "warnings": warnings, "error": None})
+        except Exception as e:
+            results.append({"date": selected_date, "path": None, "warnings": [], "error": f"{type(e).__name__}: {e}"})
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="기준일별 국가별 주가·환율 엑셀 파일 생성")
+    parser.add_argument("dates", nargs="+", type=lambda s: datetime.strptime(s, "%Y-%m-%d").date(), help="기준일 (YYYY-MM-DD)")
+    parser.add_argument("--out", default=".", help="저장 폴더")
+    parser.add_argument("--index-list", default=INDEX_LIST_PATH, help="종목 목록 CSV")
+    args = parser.parse_args(argv)
+
+    results = write_reports(args.dates, args.out, args.index_list)
+    for result in results:
+        status = result["error"] or result["path"] or "파일 없음"
+        print(f"{result['date']}: {status}")
+        for message in result["warnings"]:
+            print(f"  {message}")
+    return 1 if any(result["error"] or result["path"] is None for result in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
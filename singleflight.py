@@ -0,0 +1,104 @@
+import asyncio
+import threading
+
+# ===========================================
+# ✅ 동일 요청 합치기 (single-flight)
+# ===========================================
+# 같은 키로 동시에 들어온 호출은 먼저 온 호출(leader) 하나만 실행하고,
+# 나머지는 그 결과(또는 예외)를 기다렸다가 그대로 공유한다.
+# 스레드용 SingleFlight 와 이벤트 루프용 AsyncSingleFlight 모두 이름으로 등록되어 coalescing_stats() 에 함께 집계된다.
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._counters = {"calls": 0, "executed": 0, "deduplicated": 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            self._counters["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._counters["executed"] += 1
+            else:
+                self._counters["deduplicated"] += 1
+
+        if leader:
+            try:
+                call.result = fn(*args, **kwargs)
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, in_flight=len(self._calls))
+
+
+# 이벤트 루프용: 같은 키의 코루틴은 하나의 작업(Task)으로 합침 (do 는 루프 스레드에서만 호출)
+class AsyncSingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()   # 집계(stats)는 다른 스레드에서도 읽음
+        self._tasks = {}
+        self._counters = {"calls": 0, "executed": 0, "deduplicated": 0}
+
+    async def do(self, key, factory):
+        task = self._tasks.get(key)
+        with self._lock:
+            self._counters["calls"] += 1
+            self._counters["executed" if task is None else "deduplicated"] += 1
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        # 기다리던 쪽이 취소되어도 공유 작업은 계속 진행
+        return await asyncio.shield(task)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, in_flight=len(self._tasks))
+
+
+def _registered(name, cls):
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = cls(name)
+        return _registry[name]
+
+
+# 이름으로 공유: 같은 이름이면 프로세스 전체에서 같은 인스턴스를 사용
+def get_flight(name):
+    return _registered(name, SingleFlight)
+
+
+def get_async_flight(name):
+    return _registered(name, AsyncSingleFlight)
+
+
+def coalescing_stats():
+    with _registry_lock:
+        flights = list(_registry.values())
+    return {flight.name: flight.stats() for flight in flights}
@@ -0,0 +1,102 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+# ===========================================
+# ✅ 프로세스 공용 조회 결과(snapshot) 저장소
+# ===========================================
+# 세션은 결과 DataFrame 대신 가벼운 핸들(SnapshotHandle)만 session_state 에 두고,
+# 실제 결과는 내용 해시를 키로 이 저장소에 한 벌만 보관한다 (같은 결과를 보는 세션끼리 공유).
+# - 참조 수: 핸들이 만들어질 때 +1, 핸들이 사라질 때(세션 종료·다른 결과로 교체) -1
+# - 참조 수가 0 인 결과만 LRU 순서로 정리해 SNAPSHOT_MAX_ENTRIES 개 이하로 유지
+# 보관된 결과는 읽기 전용으로 다룬다 (표시·엑셀 경로 모두 복사 없이 그대로 읽음).
+
+SNAPSHOT_MAX_ENTRIES = 16
+
+
+class Snapshot:
+    __slots__ = ("key", "df_final", "df_raw", "recent_business_days")
+
+    def __init__(self, key, df_final, df_raw, recent_business_days):
+        self.key = key
+        self.df_final = df_final
+        self.df_raw = df_raw
+        self.recent_business_days = tuple(recent_business_days)
+
+
+class SnapshotHandle:
+    __slots__ = ("key", "_store", "__weakref__")
+
+    def __init__(self, store, key):
+        self.key = key
+        self._store = store
+        weakref.finalize(self, store._release, key)
+
+    @property
+    def snapshot(self):
+        return self._store.get(self.key)
+
+
+class SnapshotStore:
+    def __init__(self, max_entries=SNAPSHOT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # 핸들 해제(finalize)는 GC 도중 어느 스레드에서든 불릴 수 있으므로 재진입 가능한 잠금 사용
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()
+        self._refs = {}
+
+    # 같은 키가 이미 있으면 보관 중인 결과를 그대로 쓰고(인자로 받은 사본은 버려짐) 참조만 늘림
+    def put(self, key, df_final, df_raw, recent_business_days):
+        with self._lock:
+            if key not in self._entries:
+                _freeze(df_raw)
+                self._entries[key] = Snapshot(key, df_final, df_raw, recent_business_days)
+            self._entries.move_to_end(key)
+            self._refs[key] = self._refs.get(key, 0) + 1
+            self._evict()
+        return SnapshotHandle(self, key)
+
+    def get(self, key):
+        with self._lock:
+            snapshot = self._entries.get(key)
+            if snapshot is not None:
+                self._entries.move_to_end(key)
+            return snapshot
+
+    def _release(self, key):
+        with self._lock:
+            self._refs[key] -= 1
+            if self._refs[key] == 0:
+                del self._refs[key]
+            self._evict()
+
+    def _evict(self):
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_entries:
+                break
+            if key not in self._refs:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "referenced": len(self._refs), "handles": sum(self._refs.values())}
+
+
+# 공유되는 원시 가격 행렬은 제자리 수정이 되지 않도록 잠금
+def _freeze(df_raw):
+    for values in (getattr(df_raw, "closes", None), getattr(df_raw, "present", None), getattr(df_raw, "days", None)):
+        if values is not None:
+            values.flags.writeable = False
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+# 프로세스 전체에서 하나의 저장소를 공유
+def get_snapshot_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SnapshotStore()
+        return _store
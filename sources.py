@@ -0,0 +1,459 @@
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+from fetch_plan import widen_window, window_span
+from market_calendar import get_market_calendar
+from notices import warn
+from price_store import get_price_store
+from raw_prices import RAW_COLUMNS
+from singleflight import get_flight
+from yahoo_chart import YAHOO_CHART_HEADERS, YahooChartError, chart_params, chart_url, clip_to_range, parse_chart
+
+# ===========================================
+# ✅ 수집 출처(source) 어댑터
+# ===========================================
+# 모든 어댑터는 ["국가", "구분", "단위", "Ticker", "Date", "Close"] 형식의 DataFrame 또는 None 을 반환
+# - 빈 DataFrame: 요청은 성공했지만 해당 기간 데이터가 없음 (휴장일 등, 수집 완료로 기록)
+# - None: 수집 실패 (경고를 남기고 저장하지 않음)
+# yfinance·requests·bs4 는 import 비용이 커서 해당 출처를 처음 쓸 때 함수 안에서 불러옴
+
+# yf.download 는 모듈 전역 상태(shared._DFS)를 사용하므로 프로세스 전체에서 한 번에 하나만 실행
+_YF_DOWNLOAD_LOCK = threading.Lock()
+
+# ✅ 네이버 환율 일별 시세
+# 네이버는 기간 지정 없이 최근 N건을 최신순으로 내려주므로 필요한 건수만큼만 요청
+NAVER_MAX_PAGE_SIZE = 500
+NAVER_INCREMENTAL_PAGE_SIZE = 10         # 이어받기 모드의 페이지당 건수
+NAVER_TIMEOUT = (3.05, 10)               # (연결, 읽기) 초
+NAVER_DEADLINE_SECONDS = 30              # 티커 하나의 전체 수집 허용 시간
+NAVER_WORLD_CODES = {"FX_USDVND", "FX_USDIDR", "FX_USDPHP", "FX_USDCNY"}
+
+_naver_session = None
+_yahoo_session = None
+_session_lock = threading.Lock()
+
+# keep-alive 연결을 재사용하는 세션 (일시적 오류는 지수 백오프로 재시도)
+def _pooled_session(headers):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+    )
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8, max_retries=retry)
+    session = requests.Session()
+    session.headers.update(headers)
+    session.mount("https://", adapter)
+    return session
+
+# 출처별 프로세스 공용 세션
+def get_naver_session():
+    global _naver_session
+    with _session_lock:
+        if _naver_session is None:
+            _naver_session = _pooled_session({"User-Agent": "Mozilla/5.0"})
+        return _naver_session
+
+def get_yahoo_session():
+    global _yahoo_session
+    with _session_lock:
+        if _yahoo_session is None:
+            _yahoo_session = _pooled_session(YAHOO_CHART_HEADERS)
+        return _yahoo_session
+
+def naver_url(ticker_code, page, page_size):
+    if ticker_code in NAVER_WORLD_CODES:
+        return f"https://finance.naver.com/marketindex/worldDailyQuote.naver?fdtc=4&marketindexCd={ticker_code}&page={page}&pageSize={page_size}"
+    return f"https://finance.naver.com/marketindex/exchangeDailyQuote.naver?marketindexCd={ticker_code}&page={page}&pageSize={page_size}"
+
+# ✅ 빠른 파서: 트리를 만들지 않고 table.tbl_exchange 의 각 행 첫 두 칸(날짜, 종가)만 정규식으로 추출
+_NAVER_TABLE_RE = re.compile(r'<table[^>]*class="[^"]*\btbl_exchange\b[^"]*"[^>]*>(.*?)</table>', re.S)
+_NAVER_ROW_RE = re.compile(
+    r"<tr[^>]*>\s*<td[^>]*>\s*(\d{4})\.(\d{2})\.(\d{2})\s*</td>\s*<td[^>]*>\s*(-?[\d,]+(?:\.\d+)?)\s*</td>"
+)
+
+# (날짜 datetime64[D] 배열, 종가 float64 배열) 을 페이지 순서(최신순)대로 반환
+# 표 구조를 인식하지 못하면 BeautifulSoup 파서로 대체
+def parse_naver_table(html):
+    table = _NAVER_TABLE_RE.search(html)
+    rows = _NAVER_ROW_RE.findall(table.group(1)) if table else []
+    if not rows:
+        quotes = parse_naver_quotes(html)
+        return (
+            np.array([d.date() for d, _ in quotes], dtype="datetime64[D]"),
+            np.array([c for _, c in quotes], dtype="float64"),
+        )
+
+    dates = np.array([f"{y}-{m}-{d}" for y, m, d, _ in rows], dtype="datetime64[D]")
+    closes = np.array([c.replace(",", "") for *_, c in rows]).astype("float64")
+    return dates, closes
+
+# BeautifulSoup 파서 (대체용): table.tbl_exchange 의 (날짜, 종가) 를 페이지 순서(최신순)대로 반환
+def parse_naver_quotes(html):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.select_one("table.tbl_exchange")
+    if table is None:
+        return []
+
+    quotes = []
+    for row in table.select("tbody > tr"):
+        cols = row.select("td")
+        if len(cols) < 2:
+            continue
+        try:
+            raw_date = cols[0].text.strip()
+            raw_close = cols[1].text.strip().replace(",", "")
+            quotes.append((datetime.strptime(raw_date, "%Y.%m.%d"), float(raw_close)))
+        except ValueError:
+            continue
+    return quotes
+
+# stop_date 가 주어지면(이어받기) 작은 페이지를 차례로 받아 stop_date 이전 날짜가 나오는 즉시 중단
+# 재시도·연결 대기를 포함한 전체 수집이 NAVER_DEADLINE_SECONDS 를 넘으면 기다리지 않고 None
+# (중간에 끊긴 결과를 저장하면 받지 못한 앞쪽 날짜까지 수집 완료로 기록되므로 버림)
+def fetch_from_naver(ticker_code, country, category, label, page_size=NAVER_MAX_PAGE_SIZE, stop_date=None):
+    import requests
+
+    deadline = time.monotonic() + NAVER_DEADLINE_SECONDS
+    try:
+        pages = _call_with_deadline(NAVER_DEADLINE_SECONDS, _fetch_naver_pages, ticker_code, page_size, stop_date, deadline)
+    except TimeoutError:
+        warn(f"⚠️ {ticker_code} (naver): 수집 제한 시간({NAVER_DEADLINE_SECONDS}초)을 넘겨 중단했습니다.")
+        return None
+    except requests.RequestException as e:
+        warn(f"{ticker_code} (naver) 에러: {e}")
+        return None
+
+    dates, closes = pages
+    return raw_frame(ticker_code, country, category, label, dates[::-1], closes[::-1])
+
+# fn 을 데몬 스레드에서 실행하고 timeout 초 안에 끝나지 않으면 TimeoutError (스레드는 진행 중인 요청만 마치고 종료)
+def _call_with_deadline(timeout, fn, *args):
+    outcome = {}
+    done = threading.Event()
+
+    def run():
+        try:
+            outcome["result"] = fn(*args)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    threading.Thread(target=run, name="naver-fetch", daemon=True).start()
+    if not done.wait(timeout):
+        raise TimeoutError
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+# 네이버 페이지 수집 → (날짜 배열, 종가 배열), 최신순. 제한 시간이 지나면 다음 페이지를 받지 않고 TimeoutError
+def _fetch_naver_pages(ticker_code, page_size, stop_date, deadline):
+    session = get_naver_session()
+    if stop_date is None:
+        response = session.get(naver_url(ticker_code, 1, page_size), timeout=NAVER_TIMEOUT)
+        response.raise_for_status()
+        return parse_naver_table(response.text)
+
+    stop_date = np.datetime64(stop_date, "D")
+    date_chunks, close_chunks = [], []
+    max_pages = -(-NAVER_MAX_PAGE_SIZE // NAVER_INCREMENTAL_PAGE_SIZE)
+    for page in range(1, max_pages + 1):
+        if time.monotonic() > deadline:
+            raise TimeoutError
+        response = session.get(naver_url(ticker_code, page, NAVER_INCREMENTAL_PAGE_SIZE), timeout=NAVER_TIMEOUT)
+        response.raise_for_status()
+        page_dates, page_closes = parse_naver_table(response.text)
+        # 최신순이므로 stop_date 이전 날짜가 처음 나오는 위치에서 자름
+        older = np.flatnonzero(page_dates < stop_date)
+        keep = older[0] if len(older) else len(page_dates)
+        date_chunks.append(page_dates[:keep])
+        close_chunks.append(page_closes[:keep])
+        if len(older) or len(page_dates) < NAVER_INCREMENTAL_PAGE_SIZE:
+            break
+    dates = np.concatenate(date_chunks) if date_chunks else np.array([], dtype="datetime64[D]")
+    closes = np.concatenate(close_chunks) if close_chunks else np.array([], dtype="float64")
+    return dates, closes
+
+# (날짜 배열, 종가 배열) → 날짜순 long 형식 DataFrame
+def raw_frame(ticker, country, category, label, dates, closes):
+    df = pd.DataFrame({
+        "국가": country,
+        "구분": category,
+        "단위": label,
+        "Ticker": ticker,
+        "Date": np.asarray(dates).astype("datetime64[ns]"),
+        "Close": closes,
+    }, columns=RAW_COLUMNS)
+    return df.sort_values("Date", kind="stable").reset_index(drop=True)
+
+def fetch_from_yfinance(ticker, start_date, end_date, country, category, label, warn_empty=True):
+    import yfinance as yf
+    from yfinance.exceptions import YFPricesMissingError
+
+    try:
+        # ✅ yf.download 는 모듈 전역 상태(shared._DFS)를 공유하므로 병렬 수집 시 Ticker.history 사용
+        # raise_errors=True: 요청 실패와 "기간 내 데이터 없음"(YFPricesMissingError)을 구분
+        try:
+            data = yf.Ticker(ticker).history(
+                start=start_date.strftime("%Y-%m-%d"),
+                end=end_date.strftime("%Y-%m-%d"),
+                auto_adjust=True,
+                actions=False,
+                raise_errors=True
+            )
+        except YFPricesMissingError:
+            data = pd.DataFrame()
+        # ✅ 데이터가 비어있는 경우 경고 출력
+        if data.empty:
+            if warn_empty:
+                warn(f"⚠️ {ticker} (yfinance): 조회된 데이터가 없습니다. 기간: {start_date.date()} ~ {end_date.date()}")
+            return raw_frame(ticker, country, category, label, [], [])
+
+        if "Close" not in data.columns:
+            warn(f"⚠️ {ticker} (yfinance): 'Close' 컬럼이 존재하지 않습니다.")
+            return None
+
+        data.index = data.index.tz_localize(None)
+        data = data.reset_index()
+        data = data[["Date", "Close"]]
+        data["국가"] = country
+        data["구분"] = category
+        data["단위"] = label
+        data["Ticker"] = ticker
+
+        return data[["국가", "구분", "단위", "Ticker", "Date", "Close"]]
+
+    except Exception as e:
+        warn(f"{ticker} (yfinance) 에러: {e}")
+        return None
+
+# ✅ Yahoo chart API 직접 조회 (수집출처 = yahoo_chart): yfinance 없이 필요한 필드만 NumPy 로 변환
+def fetch_from_yahoo_chart(ticker, start_date, end_date, country, category, label, warn_empty=True):
+    import requests
+
+    try:
+        response = get_yahoo_session().get(chart_url(ticker), params=chart_params(start_date, end_date), timeout=NAVER_TIMEOUT)
+        response.raise_for_status()
+        dates, closes = clip_to_range(*parse_chart(response.content), start_date, end_date)
+    except (requests.RequestException, YahooChartError, ValueError, KeyError, IndexError) as e:
+        warn(f"{ticker} (yahoo chart) 에러: {e}")
+        return None
+
+    if len(dates) == 0 and warn_empty:
+        warn(f"⚠️ {ticker} (yahoo chart): 조회된 데이터가 없습니다. 기간: {start_date.date()} ~ {end_date.date()}")
+    return raw_frame(ticker, country, category, label, dates, closes)
+
+def naver_page_size(fetch_start):
+    # 누락 구간의 영업일 수 + 여유분 (휴장일·주말 데이터 포함 대비)
+    missing_days = np.busday_count(fetch_start.date(), datetime.now().date()) + 10
+    return int(min(max(missing_days, 10), NAVER_MAX_PAGE_SIZE))
+
+# delta=True 이면 저장소에 이미 있는 티커의 이어받기 구간 또는 계획 구간 요청 (빈 결과 경고 생략)
+def _fetch_from_source(ticker, start_date, end_date, row_meta, delta=False):
+    source = row_meta.get("수집출처", "yfinance")
+    country = row_meta["국가"]
+    category = row_meta["구분"]
+    label = row_meta["항목명_짧은"]
+
+    if source == "yfinance":
+        # 이어받기(delta) 구간은 주말·휴장일이면 비어 있는 것이 정상이므로 경고 생략
+        return fetch_from_yfinance(ticker, start_date, end_date, country, category, label, warn_empty=not delta)
+    elif source == "yahoo_chart":
+        return fetch_from_yahoo_chart(ticker, start_date, end_date, country, category, label, warn_empty=not delta)
+    elif source == "naver":
+        # 받을 건수가 적으면 작은 페이지로 나눠 받다가 start_date 이전 날짜가 나오면 중단, 많으면 한 번에 요청
+        page_size = naver_page_size(start_date)
+        if page_size <= NAVER_INCREMENTAL_PAGE_SIZE * 3:
+            return fetch_from_naver(ticker, country, category, label, stop_date=start_date.date())
+        return fetch_from_naver(ticker, country, category, label, page_size=page_size)
+    else:
+        warn(f"{ticker}의 수집출처 {source}는 지원되지 않습니다.")
+        return None
+
+def as_fetch_datetime(day, like):
+    return datetime.combine(day, datetime.min.time()).replace(tzinfo=like.tzinfo)
+
+# warn_empty=False 이면 빈 결과 경고를 생략 (계획 구간은 휴장일이면 비어 있을 수 있음)
+# 구간이 저장소에 있거나 새로 받아 저장했으면 True, 수집에 실패했으면 False
+def _ensure_stored(store, ticker, start_date, end_date, row_meta, warn_empty=True):
+    missing = store.missing_range(ticker, start_date, end_date)
+    if missing is None:
+        return True
+    # 같은 티커·구간을 동시에 갱신하려는 요청은 하나로 합침
+    key = (row_meta.get("수집출처", "yfinance"), ticker, missing)
+    return get_flight("refresh_ticker").do(key, _refresh_ticker, store, ticker, missing, start_date, row_meta, warn_empty)
+
+def _refresh_ticker(store, ticker, missing, like, row_meta, warn_empty=True):
+    fetch_start = as_fetch_datetime(missing[0], like)
+    fetch_end = as_fetch_datetime(missing[1], like)
+    delta = not warn_empty or store.last_date(ticker) is not None
+    data = _fetch_from_source(ticker, fetch_start, fetch_end, row_meta, delta=delta)
+    if data is None:
+        return False
+    save_fetched(store, ticker, data, fetch_start, fetch_end, row_meta)
+    return True
+
+# 받은 구간을 저장: 수집 완료 구간은 종목 시장의 달력 기준으로 원천이 실제로 값을 준 거래일까지만 기록
+def save_fetched(store, ticker, data, fetch_start, fetch_end, row_meta):
+    calendar = get_market_calendar(row_meta["국가"], since=fetch_start)
+    store.save(ticker, data, fetch_start, fetch_end, calendar)
+
+# ✅ 계획된 구간(fetch_plan)만 받기
+# 기간을 지정할 수 없는 출처(네이버)는 최신순으로 받으므로 전체 범위를 한 번에 받음
+RANGELESS_SOURCES = {"naver"}
+
+# 구간 [start, anchor] 에 값이 있는지 (없으면 기준일 값을 구할 수 없음)
+def has_anchor_value(store, ticker, window):
+    return store.has_data(ticker, window[0], window[2].date() + timedelta(days=1))
+
+def _warn_no_anchor_value(ticker, window):
+    warn(f"⚠️ {ticker}: {window[2].date()} 이전 데이터가 없습니다. 기간: {window[0].date()} ~ {window[1].date()}")
+
+# 구간들의 저장 값을 한 번의 조회로 읽어 long 형식 DataFrame 하나로 (값이 없으면 None)
+def load_windows(store, ticker, windows, row_meta):
+    dates, closes = store.load_ranges(ticker, [(start, end) for start, end, _ in windows])
+    if len(dates) == 0:
+        return None
+    return raw_frame(ticker, row_meta["국가"], row_meta["구분"], row_meta["항목명_짧은"], dates, closes)
+
+# 구간별로 받고, 받았지만 기준일 이전 값이 없는 구간(연휴 등)은 앞쪽을 넓혀 다시 받음
+# 수집에 실패하면(경고는 출처 어댑터가 한 번 남김) 넓히거나 다른 구간을 더 요청하지 않고 None
+def fetch_price_windows_by_source(ticker, windows, row_meta):
+    store = get_price_store()
+    if row_meta.get("수집출처", "yfinance") in RANGELESS_SOURCES:
+        if not _ensure_stored(store, ticker, *window_span(windows), row_meta, warn_empty=False):
+            return None
+
+    fetched = []
+    for window in windows:
+        while True:
+            if not _ensure_stored(store, ticker, window[0], window[1], row_meta, warn_empty=False):
+                return None
+            if has_anchor_value(store, ticker, window):
+                break
+            wider = widen_window(window)
+            if wider is None:
+                _warn_no_anchor_value(ticker, window)
+                break
+            window = wider
+        fetched.append(window)
+    return load_windows(store, ticker, fetched, row_meta)
+
+# ✅ yfinance 일괄 조회: 같은 기간의 티커들을 한 번의 yf.download 로 받아 티커별 long 형식으로 분리
+# 티커별 실패 여부는 yf.download 가 남기는 shared._ERRORS 로 판단 ("기간 내 데이터 없음"은 실패가 아님)
+def fetch_from_yfinance_batch(rows, start_date, end_date, warn_empty=True):
+    import yfinance as yf
+
+    tickers = [row["티커"] for row in rows]
+    try:
+        with _YF_DOWNLOAD_LOCK:
+            data = yf.download(
+                tickers,
+                start=start_date.strftime("%Y-%m-%d"),
+                end=end_date.strftime("%Y-%m-%d"),
+                group_by="column",
+                progress=False
+            )
+            errors = {t: e for t, e in yf.shared._ERRORS.items() if "YFPricesMissingError" not in e}
+    except Exception as e:
+        warn(f"{', '.join(tickers)} (yfinance 일괄) 에러: {e}")
+        return {ticker: None for ticker in tickers}
+
+    if data is None or data.empty or "Close" not in data.columns.get_level_values(0):
+        close = pd.DataFrame()
+    else:
+        close = data["Close"]
+    results = {}
+    for row in rows:
+        ticker = row["티커"]
+        if ticker.upper() in errors:
+            warn(f"{ticker} (yfinance) 에러: {errors[ticker.upper()]}")
+            results[ticker] = None
+            continue
+        # yfinance 는 컬럼명을 대문자 티커로 저장함 (예: PSEi.PS -> PSEI.PS)
+        column = ticker if ticker in close.columns else ticker.upper()
+        series = close[column].dropna() if column in close.columns else pd.Series(dtype=float)
+        if series.empty:
+            if warn_empty:
+                warn(f"⚠️ {ticker} (yfinance): 조회된 데이터가 없습니다. 기간: {start_date.date()} ~ {end_date.date()}")
+            results[ticker] = raw_frame(ticker, row["국가"], row["구분"], row["항목명_짧은"], [], [])
+            continue
+
+        frame = series.rename("Close").rename_axis("Date").reset_index()
+        frame["국가"] = row["국가"]
+        frame["구분"] = row["구분"]
+        frame["단위"] = row["항목명_짧은"]
+        frame["Ticker"] = ticker
+        results[ticker] = frame[RAW_COLUMNS]
+    return results
+
+# 일괄 조회를 지원하는 출처 → 일괄 조회 함수
+BATCH_SOURCES = {
+    "yfinance": fetch_from_yfinance_batch,
+}
+
+# 수집에 실패한 티커 집합을 반환
+def _ensure_batch_stored(store, source, rows, start_date, end_date, warn_empty=True):
+    missing = {row["티커"]: store.missing_range(row["티커"], start_date, end_date) for row in rows}
+    pending = [row for row in rows if missing[row["티커"]] is not None]
+    if not pending:
+        return set()
+    key = (source, tuple((row["티커"], missing[row["티커"]]) for row in pending))
+    return get_flight("refresh_batch").do(key, _refresh_batch, store, source, pending, missing, start_date, warn_empty)
+
+def _refresh_batch(store, source, pending, missing, start_date, warn_empty=True):
+    # 티커별 누락 구간을 모두 덮는 구간으로 한 번에 요청
+    fetch_start = as_fetch_datetime(min(missing[row["티커"]][0] for row in pending), start_date)
+    fetch_end = as_fetch_datetime(max(missing[row["티커"]][1] for row in pending), start_date)
+    warn_empty = warn_empty and any(store.last_date(row["티커"]) is None for row in pending)
+    results = BATCH_SOURCES[source](pending, fetch_start, fetch_end, warn_empty=warn_empty)
+    failed = set()
+    for row in pending:
+        data = results.get(row["티커"])
+        if data is None:
+            failed.add(row["티커"])
+        else:
+            save_fetched(store, row["티커"], data, fetch_start, fetch_end, row)
+    return failed
+
+# 구간별 일괄 조회: 기준일 이전 값이 없는 티커만 모아 넓힌 구간으로 다시 일괄 조회
+# 수집에 실패한 티커는 이후 구간·넓히기 요청에서 빼고 None
+def fetch_batch_windows_by_source(source, rows, windows):
+    store = get_price_store()
+    fetched = {row["티커"]: [] for row in rows}
+    failed = set()
+    for window in windows:
+        pending = [row for row in rows if row["티커"] not in failed]
+        while pending:
+            failed |= _ensure_batch_stored(store, source, pending, window[0], window[1], warn_empty=False)
+            empty = []
+            for row in pending:
+                if row["티커"] in failed:
+                    continue
+                if has_anchor_value(store, row["티커"], window):
+                    fetched[row["티커"]].append(window)
+                else:
+                    empty.append(row)
+            wider = widen_window(window)
+            if empty and wider is None:
+                for row in empty:
+                    _warn_no_anchor_value(row["티커"], window)
+                    fetched[row["티커"]].append(window)
+                break
+            pending, window = empty, wider
+    return {
+        row["티커"]: None if row["티커"] in failed else load_windows(store, row["티커"], fetched[row["티커"]], row)
+        for row in rows
+    }
@@ -0,0 +1,78 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# ===========================================
+# ✅ 단계별 소요 시간 측정 (span)
+# ===========================================
+# with span("단계명", source=..., ticker=...): 로 감싼 구간의 경과 시간을
+# - "timing" 로거에 JSON 한 줄로 기록하고
+# - 프로세스 공용 버퍼에 (단계명, source) 별 최근 SPAN_HISTORY 개씩 보관해 p50/p95 를 계산한다.
+
+SPAN_HISTORY = 200
+
+logger = logging.getLogger("timing")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(os.environ.get("TIMING_LOG_LEVEL", "INFO"))
+    logger.propagate = False
+
+_history = {}
+_history_lock = threading.Lock()
+
+
+def _record(key, elapsed_ms):
+    with _history_lock:
+        if key not in _history:
+            _history[key] = deque(maxlen=SPAN_HISTORY)
+        _history[key].append(elapsed_ms)
+
+
+@contextmanager
+def span(name, **tags):
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        _record((name, tags.get("source")), elapsed_ms)
+        if logger.isEnabledFor(logging.INFO):
+            line = {"span": name, "ms": round(elapsed_ms, 2), **tags}
+            if error is not None:
+                line["error"] = error
+            logger.info(json.dumps(line, ensure_ascii=False, default=str))
+
+
+# (단계명, source) 별 최근 기록의 횟수·p50·p95·최댓값 (ms)
+def span_stats():
+    with _history_lock:
+        history = {key: list(values) for key, values in _history.items()}
+    stats = []
+    for (name, source), values in sorted(history.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+        values = np.asarray(values)
+        stats.append({
+            "span": name,
+            "source": source or "",
+            "count": len(values),
+            "p50_ms": float(np.percentile(values, 50)),
+            "p95_ms": float(np.percentile(values, 95)),
+            "max_ms": float(values.max()),
+        })
+    return stats
+
+
+def reset_spans():
+    with _history_lock:
+        _history.clear()
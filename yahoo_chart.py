@@ -0,0 +1,100 @@
+import json
+import re
+from datetime import datetime, timedelta
+from urllib.parse import quote
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+# ===========================================
+# ✅ Yahoo v8 chart API (yfinance 가 내부에서 쓰는 일별 시세 엔드포인트)
+# ===========================================
+# 요청 구간 앞뒤로 하루씩 여유를 두고 받은 뒤, 거래소 현지 날짜 기준으로 [start, end) 만 남긴다.
+
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{ticker}"
+YAHOO_CHART_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/123.0.0.0 Safari/537.36"
+    ),
+    "Accept": "application/json, text/javascript, */*; q=0.01",
+    "Referer": "https://finance.yahoo.com/",
+}
+
+
+def chart_url(ticker):
+    return YAHOO_CHART_URL.format(ticker=quote(ticker, safe=""))
+
+
+def _utc_midnight(day):
+    return int(datetime.combine(day, datetime.min.time()).replace(tzinfo=ZoneInfo("UTC")).timestamp())
+
+
+def chart_params(start_date, end_date):
+    return {
+        "interval": "1d",
+        "period1": _utc_midnight(start_date.date() - timedelta(days=1)),
+        "period2": _utc_midnight(end_date.date() + timedelta(days=1)),
+        "includePrePost": "false",
+        "events": "",
+    }
+
+
+class YahooChartError(ValueError):
+    pass
+
+
+# ✅ 빠른 파서: JSON 전체를 객체로 만들지 않고 필요한 필드(gmtoffset, timestamp, close) 배열만 잘라 NumPy 로 변환
+_GMTOFFSET_RE = re.compile(rb'"gmtoffset":(-?\d+)')
+
+
+def _array_text(payload, key, start=0):
+    begin = payload.find(key, start)
+    if begin < 0:
+        return None
+    begin += len(key)
+    return payload[begin:payload.find(b"]", begin)].replace(b"null", b"nan").decode("ascii")
+
+
+# 응답 → (거래소 현지 날짜 datetime64[D] 배열, 종가 float64 배열). 종가가 없는 날은 제외
+# 필드를 찾지 못하면(오류 응답 등) JSON 파서(decode_chart)로 대체
+def parse_chart(payload):
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    offset = _GMTOFFSET_RE.search(payload)
+    quote = payload.find(b'"quote":[{')
+    timestamps = _array_text(payload, b'"timestamp":[')
+    closes = _array_text(payload, b'"close":[', quote) if quote >= 0 else None
+    if offset is None or timestamps is None or closes is None:
+        return decode_chart(payload)
+
+    timestamps = np.fromstring(timestamps, dtype="int64", sep=",")
+    closes = np.fromstring(closes, dtype="float64", sep=",")
+    if len(timestamps) != len(closes):
+        return decode_chart(payload)
+    dates = ((timestamps + int(offset.group(1))) // 86400).astype("datetime64[D]")
+    valid = ~np.isnan(closes)
+    return dates[valid], closes[valid]
+
+
+# JSON 파서 (대체용)
+def decode_chart(payload):
+    chart = json.loads(payload)["chart"]
+    if chart.get("error"):
+        raise YahooChartError(chart["error"].get("description") or str(chart["error"]))
+    result = (chart.get("result") or [None])[0]
+    if not result or "timestamp" not in result:
+        return np.array([], dtype="datetime64[D]"), np.array([], dtype="float64")
+
+    offset = result.get("meta", {}).get("gmtoffset", 0)
+    timestamps = np.asarray(result["timestamp"], dtype="int64")
+    closes = np.array(result["indicators"]["quote"][0]["close"], dtype="float64")
+    dates = ((timestamps + offset) // 86400).astype("datetime64[D]")
+    valid = ~np.isnan(closes)
+    return dates[valid], closes[valid]
+
+
+def clip_to_range(dates, closes, start_date, end_date):
+    keep = (dates >= np.datetime64(start_date.date(), "D")) & (dates < np.datetime64(end_date.date(), "D"))
+    return dates[keep], closes[keep]